@@ -0,0 +1,86 @@
+def column_buffer(series):
+    '''
+        Returns the NumPy array that stores the values of `series` without copying it.
+        Categorical columns are represented by their integer codes and sparse columns by
+        their stored values.
+    '''
+    import pandas as pd
+
+    values = series.array
+    if isinstance(values,pd.Categorical):
+        return values.codes
+    if isinstance(values,pd.arrays.SparseArray):
+        return values.sp_values
+    return series.to_numpy()
+
+
+def allocated_bytes(before,after):
+    '''
+        Counts the bytes of the column buffers (and index) of `after` that are not shared with
+        `before`, i.e. the memory a cleaning step really allocated.
+
+        Parameters:
+            before (pd.DataFrame): The frame the step started from.
+            after (pd.DataFrame): The frame the step produced.
+
+        Returns:
+            int: Number of newly allocated bytes.
+    '''
+    import numpy as np
+    import pandas as pd
+
+    total = 0
+    for column in after.columns:
+        buffer = column_buffer(after[column])
+        if column in before.columns and np.may_share_memory(buffer,column_buffer(before[column])):
+            continue
+        # A sparse column also allocates the positions of its stored values
+        values = after[column].array
+        total += values.nbytes if isinstance(values,pd.arrays.SparseArray) else buffer.nbytes
+    if after.index is not before.index and not after.index.equals(before.index):
+        total += after.index.nbytes
+    return total
+
+
+def copy_on_write_step(method):
+    '''
+        Decorator for the data-changing methods of the cleaning classes, which take a
+        `copy_on_write` constructor argument and start with `allocated_bytes = None` and an
+        empty `allocation_log`.
+
+        When the instance was created with `copy_on_write=True`, the step runs on a shallow copy
+        of `self.data`: all columns are shared with the caller's frame as zero-copy views, and the
+        methods only ever replace whole columns, so the caller's frame is never modified. After
+        the step, the bytes it allocated are stored in `self.allocated_bytes` and appended to
+        `self.allocation_log` as `(method_name, bytes)`.
+
+        Without `copy_on_write` the method runs unchanged on `self.data`.
+    '''
+    import functools
+
+    @functools.wraps(method)
+    def step(self,*args,**kwargs):
+        if not getattr(self,'copy_on_write',False) or getattr(self,'_copy_on_write_active',False):
+            return method(self,*args,**kwargs)
+
+        import pandas as pd
+
+        before = self.data
+        shallow = before.copy(deep=False)
+        if hasattr(self,'_share_data'):
+            self._share_data(shallow)
+        else:
+            self.data = shallow
+
+        self._copy_on_write_active = True
+        try:
+            result = method(self,*args,**kwargs)
+        finally:
+            self._copy_on_write_active = False
+
+        after = result if isinstance(result,pd.DataFrame) else self.data
+        self.allocated_bytes = allocated_bytes(before,after)
+        self.allocation_log.append((method.__name__,self.allocated_bytes))
+        return result
+
+    return step
@@ -1,140 +1,461 @@
+from render_cache import cached_render
+
+
 class Data_Visualization:
 
-    def __init__(self, data):
+    def __init__(self, data, chunksize=1000000, cache_dir=None, cache_bytes=256*2**20):
+        from render_cache import Render_Cache
+        # data is a DataFrame or the path of a CSV file; both are read chunksize rows at a time
+        # by the binned plots, so their memory does not grow with the number of rows
         self.data = data
+        self.chunksize = chunksize
+        # When set, plots are saved here instead of their default plots/<name>.png
+        self.output_path = None
+        # With a cache_dir, unchanged plots are served from a render cache, see cached_render
+        self.cache = Render_Cache(cache_dir, cache_bytes) if cache_dir else None
 
-    def histogram(self, *args):
+    def _save(self, default_path):
+        import os
+        import matplotlib.pyplot as plt
+        path = self.output_path or default_path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The format is explicit so that paths without a .png suffix (cache files) work
+        plt.savefig(path, format='png', dpi=300, bbox_inches='tight')
+        plt.close()
+        return path
+
+    def _chunks(self, columns):
+        import pandas as pd
+        if isinstance(self.data, str):
+            yield from pd.read_csv(self.data, usecols=columns, chunksize=self.chunksize)
+        else:
+            for start in range(0, len(self.data), self.chunksize):
+                yield self.data.iloc[start:start + self.chunksize][columns]
+
+    @staticmethod
+    def _column_values(chunk, column):
+        # None stands for the row position, as in the one-column scatter plot
+        return chunk.index.to_numpy() if column is None else chunk[column].to_numpy()
+
+    def _value_range(self, columns):
+        import numpy as np
+        low = {column: np.inf for column in columns}
+        high = {column: -np.inf for column in columns}
+        for chunk in self._chunks([column for column in columns if column is not None]):
+            for column in columns:
+                values = np.asarray(self._column_values(chunk, column), dtype=float)
+                values = values[~np.isnan(values)]
+                if len(values):
+                    low[column] = min(low[column], values.min())
+                    high[column] = max(high[column], values.max())
+        # np.histogram widens an empty range the same way, and uses (0, 1) when there are no values
+        return {column: (0.0, 1.0) if low[column] > high[column]
+                else (low[column] - 0.5, high[column] + 0.5) if low[column] == high[column]
+                else (low[column], high[column]) for column in columns}
+
+    def _bin_edges(self, columns, bins, ranges):
+        import numpy as np
+        # bins follows np.histogram: a count, an array of edges, or an estimator name such as
+        # 'auto', which needs every value of the column; counts share one pass for the range
+        counted = [column for column, column_bins, column_range in zip(columns, bins, ranges)
+                   if column_range is None and not isinstance(column_bins, str) and np.ndim(column_bins) == 0]
+        value_range = self._value_range(counted) if counted else {}
+        edges = []
+        for column, column_bins, column_range in zip(columns, bins, ranges):
+            if isinstance(column_bins, str):
+                values = np.concatenate([np.empty(0)] + [np.asarray(self._column_values(chunk, column), dtype=float)
+                                                          for chunk in self._chunks([] if column is None else [column])])
+                edges.append(np.histogram_bin_edges(values[~np.isnan(values)], bins=column_bins, range=column_range))
+            else:
+                if column_range is None:
+                    column_range = value_range.get(column)
+                edges.append(np.histogram_bin_edges([], bins=column_bins, range=column_range))
+        return edges
+
+    @staticmethod
+    def _bin_index(values, edges):
+        import numpy as np
+        n_bins = len(edges) - 1
+        values = np.asarray(values, dtype=float)
+        widths = np.diff(edges)
+        if not np.allclose(widths, widths[0], rtol=1e-9, atol=0):
+            # Explicit uneven edges, the last one closed as in np.histogram
+            index = np.searchsorted(edges, values, side='right') - 1
+            index[values == edges[-1]] = n_bins - 1
+            return index, (index >= 0) & (index < n_bins)
+        # Equal-width bins are found arithmetically and fixed up at the edges like np.histogram
+        # does, which is much faster than its searchsorted path for explicit edges
+        index = np.floor((values - edges[0]) * (n_bins / (edges[-1] - edges[0])))
+        index = np.clip(np.nan_to_num(index, nan=-1), -1, n_bins).astype(np.intp)
+        index[values == edges[-1]] = n_bins - 1
+        inside = (index >= 0) & (index < n_bins)
+        index[inside & (values < edges[np.clip(index, 0, n_bins)])] -= 1
+        index[inside & (values >= edges[np.clip(index + 1, 0, n_bins)]) & (index != n_bins - 1)] += 1
+        valid = (index >= 0) & (index < n_bins) & (values >= edges[0]) & (values <= edges[-1])
+        return index, valid
+
+    def bin_counts(self, feature_name, bins=10, range=None):
+        import numpy as np
+        edges, = self._bin_edges([feature_name], [bins], [range])
+        counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        for chunk in self._chunks([feature_name]):
+            index, valid = self._bin_index(chunk[feature_name], edges)
+            counts += np.bincount(index[valid], minlength=len(counts))
+        return counts, edges
+
+    def aggregate_2d(self, x, y, bins=10, range=None, values=None, aggregate='count'):
+        import numpy as np
+        # aggregate is 'count', or 'mean' / 'max' of the values column; empty cells are NaN for
+        # the latter two
+        if aggregate not in ('count', 'mean', 'max'):
+            raise ValueError("aggregate must be one of ('count', 'mean', 'max')")
+        if aggregate != 'count' and values is None:
+            raise ValueError(f"aggregate='{aggregate}' needs a values column")
+        # As in np.histogram2d, a pair gives each axis its own bins and anything else is shared
+        if not isinstance(bins, (str, int, np.integer)) and len(bins) == 2:
+            x_bins, y_bins = bins
+        else:
+            x_bins = y_bins = bins
+        x_edges, y_edges = self._bin_edges([x, y], [x_bins, y_bins], [None, None] if range is None else range)
+        n_x, n_y = len(x_edges) - 1, len(y_edges) - 1
+        counts = np.zeros(n_x * n_y, dtype=np.int64)
+        totals = np.zeros(n_x * n_y)
+        maximum = np.full(n_x * n_y, -np.inf)
+        columns = [column for column in (x, y, values) if column is not None]
+        for chunk in self._chunks(list(dict.fromkeys(columns))):
+            x_index, x_valid = self._bin_index(self._column_values(chunk, x), x_edges)
+            y_index, y_valid = self._bin_index(self._column_values(chunk, y), y_edges)
+            valid = x_valid & y_valid
+            if values is not None:
+                weights = chunk[values].to_numpy(dtype=float)
+                valid &= ~np.isnan(weights)
+                weights = weights[valid]
+            cells = x_index[valid] * n_y + y_index[valid]
+            counts += np.bincount(cells, minlength=len(counts))
+            if aggregate == 'mean':
+                totals += np.bincount(cells, weights=weights, minlength=len(totals))
+            elif aggregate == 'max':
+                np.maximum.at(maximum, cells, weights)
+
+        if aggregate == 'count':
+            grid = counts
+        elif aggregate == 'mean':
+            grid = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+        else:
+            grid = np.where(counts > 0, maximum, np.nan)
+        return grid.reshape(n_x, n_y), x_edges, y_edges
+
+    def bin_counts_2d(self, x, y, bins=10, range=None):
+        return self.aggregate_2d(x, y, bins=bins, range=range)
+
+    def _raster(self, x, y, values=None, aggregate='count', pixels=(800, 600)):
+        import matplotlib.pyplot as plt
+        import numpy as np
+        from matplotlib.colors import LogNorm
+        # Every row lands in one pixel of the grid, which is drawn as a single image
+        grid, x_edges, y_edges = self.aggregate_2d(x, y, bins=pixels, values=values, aggregate=aggregate)
+        grid = np.ma.masked_invalid(np.where(grid == 0, np.nan, grid) if aggregate == 'count' else grid)
+        plt.imshow(grid.T, origin='lower', aspect='auto', interpolation='nearest',
+                   extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                   norm=LogNorm() if aggregate == 'count' else None, cmap='viridis')
+        plt.colorbar(label='count' if aggregate == 'count' else f'{aggregate} of {values}')
+        plt.xlabel('' if x is None else x)
+        plt.ylabel(y)
+        self.sampling_ratio = 1.0
+
+    def _sample(self, max_points):
+        import matplotlib.pyplot as plt
+        # Vector plots of more than max_points rows draw a random sample, reported on the plot
+        data = self.data
+        self.sampling_ratio = 1.0
+        if max_points is not None and len(data) > max_points:
+            data = data.sample(max_points, random_state=0).sort_index()
+            self.sampling_ratio = max_points / len(self.data)
+            plt.title(f'sampling ratio {self.sampling_ratio:.4f}')
+        return data
+
+    @cached_render
+    def histogram(self, *args, bins=10):
         import matplotlib.pyplot as plt
         if len(args) == 1:
-            plt.hist(self.data[args[0]])
-            plt.savefig("plots/1dhist.png", dpi=300, bbox_inches='tight')
-            plt.close()
+            counts, edges = self.bin_counts(args[0], bins=bins)
+            plt.hist(edges[:-1], bins=edges, weights=counts)
+            return self._save('plots/1dhist.png')
         elif len(args) == 2:
-            plt.hist2d(self.data[args[0]], self.data[args[1]])
-            plt.savefig("plots/2dhist.png", dpi=300, bbox_inches='tight')
-            plt.close()
+            counts, x_edges, y_edges = self.bin_counts_2d(args[0], args[1], bins=bins)
+            plt.pcolormesh(x_edges, y_edges, counts.T)
+            return self._save('plots/2dhist.png')
         else:
             return "Error"
 
+    @cached_render
     def box_plt(self, feature_name):
         import matplotlib.pyplot as plt
         plt.boxplot(self.data[feature_name])
-        plt.savefig('plots/boxplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/boxplot.png')
 
+    @cached_render
     def violin_plot(self, feature_name):
         import matplotlib.pyplot as plt
         plt.violinplot(self.data[feature_name])
-        plt.savefig('plots/violinplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/violinplot.png')
 
+    @cached_render
     def barplot(self, feature_name):
         import matplotlib.pyplot as plt
         feature_series = self.data[feature_name].value_counts()
         plt.bar(feature_series.index, feature_series.values)
-        plt.savefig('plots/barplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/barplot.png')
 
+    @cached_render
     def grouped_barplot(self, x, y, hue):
         import matplotlib.pyplot as plt
         import seaborn as sns
         sns.barplot(data=self.data, x=x, y=y, hue=hue)
-        plt.savefig('plots/grouped_barplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/grouped_barplot.png')
 
+    @cached_render(all_columns=True)
     def stacked_barplot(self):
         import matplotlib.pyplot as plt
         self.data.plot(kind='bar', stacked=True)
-        plt.savefig('plots/stacked_barplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/stacked_barplot.png')
 
+    @cached_render
     def piechart(self, feature_name):
         import matplotlib.pyplot as plt
         feature_counts = self.data[feature_name].value_counts()
         plt.pie(feature_counts.values, labels=feature_counts.index, autopct='%1.1f%%')
-        plt.savefig('plots/piechart.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/piechart.png')
 
-    def scatter_plot(self, *args):
+    @cached_render
+    def scatter_plot(self, *args, raster=False, pixels=(800, 600), max_points=None):
         import matplotlib.pyplot as plt
         import seaborn as sns
-        if len(args) == 1:
-            sns.scatterplot(x=self.data.index, y=self.data[args[0]])
+        if raster:
+            self._raster(None if len(args) == 1 else args[0], args[-1], pixels=pixels)
         else:
-            sns.scatterplot(x=self.data[args[0]], y=self.data[args[1]])
-        plt.savefig('plots/scatter.png', dpi=300, bbox_inches='tight')
-        plt.close()
+            data = self._sample(max_points)
+            if len(args) == 1:
+                sns.scatterplot(x=data.index, y=data[args[0]])
+            else:
+                sns.scatterplot(x=data[args[0]], y=data[args[1]])
+        return self._save('plots/scatter.png')
 
-    def bubble_chart(self, x, y, size):
+    @cached_render
+    def bubble_chart(self, x, y, size, raster=False, aggregate='mean', pixels=(800, 600), max_points=None):
         import matplotlib.pyplot as plt
-        plt.scatter(self.data[x], self.data[y], s=self.data[size]*100, alpha=0.5)
-        plt.savefig('plots/bubble_chart.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        if raster:
+            # Pixels are coloured by the mean or max of size instead of drawing a marker per row
+            self._raster(x, y, values=size, aggregate=aggregate, pixels=pixels)
+        else:
+            data = self._sample(max_points)
+            plt.scatter(data[x], data[y], s=data[size]*100, alpha=0.5)
+        return self._save('plots/bubble_chart.png')
 
+    @cached_render
     def line_plot(self, *args):
         import matplotlib.pyplot as plt
         plt.plot(self.data[args[0]], self.data[args[1]])
-        plt.savefig('plots/line.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/line.png')
 
+    @cached_render
     def area_plot(self, feature_name):
         import matplotlib.pyplot as plt
         self.data[[feature_name]].plot(kind='area', stacked=False)
-        plt.savefig('plots/areaplot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/areaplot.png')
 
-    def hexbin_density_plot(self, *args):
+    @cached_render
+    def hexbin_density_plot(self, *args, gridsize=30, resolution=16):
         import matplotlib.pyplot as plt
-        plt.hexbin(self.data[args[0]], self.data[args[1]], gridsize=30, cmap='Blues')
+        import numpy as np
+        # The points are first counted on a grid resolution times finer than the hexagons,
+        # then every cell centre is drawn with its count as weight
+        counts, x_edges, y_edges = self.bin_counts_2d(args[0], args[1], bins=gridsize * resolution)
+        x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+        y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+        x_grid, y_grid = np.meshgrid(x_centers, y_centers, indexing='ij')
+        plt.hexbin(x_grid.ravel(), y_grid.ravel(), C=counts.ravel(), reduce_C_function=np.sum,
+                   gridsize=gridsize, cmap='Blues',
+                   extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
         plt.colorbar()
-        plt.savefig('plots/hexbin.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/hexbin.png')
 
+    @cached_render
     def kde_plot(self, feature_name):
         import seaborn as sns
         import matplotlib.pyplot as plt
         sns.kdeplot(self.data[feature_name], fill=True)
-        plt.savefig('plots/kde_plot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/kde_plot.png')
 
+    @cached_render(all_columns=True)
     def corr_heatmaps(self):
         import matplotlib.pyplot as plt
         import seaborn as sns
         numeric_data = self.data.select_dtypes(include='number')
         sns.heatmap(numeric_data.corr(), annot=True, cmap='coolwarm')
-        plt.savefig('plots/heatmap.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/heatmap.png')
 
+    @cached_render
     def count_plot(self, feature_name):
         import seaborn as sns
         import matplotlib.pyplot as plt
         sns.countplot(x=self.data[feature_name])
-        plt.savefig('plots/count_plot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/count_plot.png')
 
+    @cached_render(all_columns=True)
     def pair_plot(self):
         import seaborn as sns
         import matplotlib.pyplot as plt
         sns.pairplot(self.data)
-        plt.savefig('plots/pair_plot.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/pair_plot.png')
 
+    @cached_render
     def treemap(self, size_column, label_column):
         import matplotlib.pyplot as plt
         import squarify
         squarify.plot(sizes=self.data[size_column], label=self.data[label_column], alpha=.7)
         plt.axis('off')
-        plt.savefig('plots/treemap.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/treemap.png')
 
+    @cached_render(all_columns=True)
     def parallel_coordinates_plot(self, class_column):
         from pandas.plotting import parallel_coordinates
         import matplotlib.pyplot as plt
         parallel_coordinates(self.data, class_column)
-        plt.savefig('plots/parallel_coordinates.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        return self._save('plots/parallel_coordinates.png')
+
+    def render_bytes(self, method, *args, **kwargs):
+        # Returns the image of a plot as PNG bytes, from the render cache when possible
+        if self.cache is not None:
+            all_columns = getattr(getattr(type(self), method), 'all_columns', False)
+            image = self.cache.get_bytes(self.cache.key(method, self.data, args, kwargs, all_columns))
+            if image is not None:
+                return image
+        path = getattr(self, method)(*args, **kwargs)
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def render_batch(self, specs, n_jobs=None):
+        # Renders a manifest of plots in a process pool on the Agg backend. Every spec is a dict
+        # {'method': 'histogram', 'args': [...], 'kwargs': {...}, 'output_path': ...}; without an
+        # output_path the plot goes to plots/<position>_<method>.png. The frame is put in shared
+        # memory once and every worker maps it, instead of receiving a pickled copy per task.
+        # Workers use the same render cache; the keys are computed here, on the original frame,
+        # because the workers' copy stores text columns as categoricals.
+        # Returns one {'method', 'output_path', 'seconds', 'cached'} dict per spec, in manifest order.
+        from concurrent.futures import ProcessPoolExecutor
+        specs = [dict(spec, output_path=spec.get('output_path') or f"plots/{position:03d}_{spec['method']}.png")
+                 for position, spec in enumerate(specs)]
+        cache = (None, None)
+        if self.cache is not None:
+            cache = (self.cache.directory, self.cache.max_bytes)
+            for spec in specs:
+                all_columns = getattr(getattr(type(self), spec['method']), 'all_columns', False)
+                spec['cache_key'] = self.cache.key(spec['method'], self.data, tuple(spec.get('args', ())),
+                                                   spec.get('kwargs', {}), all_columns)
+        layout, segments = _share_frame(self.data)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach_frame,
+                                     initargs=(layout, self.chunksize) + cache) as pool:
+                return list(pool.map(_render_spec, specs))
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+
+def _share_frame(data):
+    # Numeric, boolean and naive datetime arrays are copied once into shared memory; every other
+    # column (and a non-range index) is factorized and only its codes are shared, the (few)
+    # distinct values are pickled. Object arrays must never be shared: they hold pointers
+    import numpy as np
+    import pandas as pd
+    from multiprocessing import shared_memory
+
+    if isinstance(data, str):
+        return data, []
+
+    def share(values):
+        segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+        segments.append(segment)
+        return segment.name, values.dtype.str, values.shape
+
+    def share_values(values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return share(np.asarray(values.cat.codes)), (values.cat.categories, values.cat.ordered)
+        array = values.to_numpy()
+        if array.dtype.kind in 'biufcmM':
+            return share(array), None
+        codes, uniques = pd.factorize(values)
+        # Sharing the codes in the dtype pandas picks for them lets workers wrap them uncopied
+        return share(np.asarray(pd.Categorical.from_codes(codes, uniques).codes)), (uniques, False)
+
+    segments = []
+    columns = []
+    try:
+        for column in data.columns:
+            columns.append((column,) + share_values(data[column]))
+        if isinstance(data.index, pd.RangeIndex):
+            index = ('range', (data.index.start, data.index.stop, data.index.step))
+        else:
+            index = ('values',) + share_values(data.index.to_series(index=None))
+    except BaseException:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        raise
+    return (columns, index), segments
+
+
+_shared = {}
+
+
+def _attach_frame(layout, chunksize, cache_dir=None, cache_bytes=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    # Importing pyplot once per worker keeps it out of the per-plot timings
+    import matplotlib.pyplot
+    import numpy as np
+    import pandas as pd
+    from multiprocessing import shared_memory
+
+    if isinstance(layout, str):
+        _shared['visualization'] = Data_Visualization(layout, chunksize, cache_dir, cache_bytes)
+        return
 
+    segments = []
 
+    def attach(buffer, categories):
+        name, dtype, shape = buffer
+        segment = shared_memory.SharedMemory(name=name)
+        segments.append(segment)
+        values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+        if categories is None:
+            return values
+        # The codes stay a view of the shared buffer, no object column is materialized
+        uniques, ordered = categories
+        return pd.Categorical.from_codes(values, categories=uniques, ordered=ordered)
 
+    columns, index = layout
+    frame = {column: attach(buffer, categories) for column, buffer, categories in columns}
+    index = pd.RangeIndex(*index[1]) if index[0] == 'range' else pd.Index(attach(*index[1:]))
+    # copy=False keeps the columns as views of the shared buffers
+    _shared['visualization'] = Data_Visualization(pd.DataFrame(frame, index=index, copy=False), chunksize,
+                                                  cache_dir, cache_bytes)
+    _shared['segments'] = segments
 
 
+def _render_spec(spec):
+    import time
+    visualization = _shared['visualization']
+    visualization.output_path = spec['output_path']
+    hits = visualization.cache.hits if visualization.cache is not None else 0
+    if 'cache_key' in spec:
+        visualization.render_keys = {spec['method']: spec['cache_key']}
+    start = time.perf_counter()
+    getattr(visualization, spec['method'])(*spec.get('args', ()), **spec.get('kwargs', {}))
+    seconds = time.perf_counter() - start
+    cached = visualization.cache is not None and visualization.cache.hits > hits
+    return {'method': spec['method'], 'output_path': spec['output_path'], 'seconds': seconds, 'cached': cached}
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from deleting_duplicates import Duplicate_Removal, Streaming_Duplicate_Removal, Fingerprint_Index
+
+data = pd.read_csv('Raw_Housing_Prices.csv')
+data = pd.concat([data, data.sample(2000, random_state=0)], ignore_index=True)
+original = data.copy()
+
+# In-memory removal matches drop_duplicates and, with copy_on_write, keeps the caller's frame
+for subset in (None, ['ID', 'Date House was Sold']):
+    for keep in ('first', 'last', False):
+        removal = Duplicate_Removal(data, copy_on_write=True)
+        pd.testing.assert_frame_equal(removal.duplicate_removal(subset, keep), data.drop_duplicates(subset, keep=keep))
+        pd.testing.assert_frame_equal(data, original)
+
+# Streaming removal matches drop_duplicates on the file's text, for every keep
+text = pd.read_csv('Raw_Housing_Prices.csv', dtype=str, keep_default_na=False)
+text = pd.concat([text, text.sample(2000, random_state=0)], ignore_index=True)
+with tempfile.TemporaryDirectory() as directory:
+    input_path, output_path = os.path.join(directory, 'input.csv'), os.path.join(directory, 'output.csv')
+    text.to_csv(input_path, index=False)
+    for keep in ('first', 'last', False):
+        rows = Streaming_Duplicate_Removal(input_path, subset=['ID'], keep=keep, chunksize=3000).transform(output_path)
+        expected = text.drop_duplicates(['ID'], keep=keep)
+        assert rows == len(expected)
+        assert pd.read_csv(output_path, dtype=str, keep_default_na=False).equals(expected.reset_index(drop=True))
+
+    # Incremental loads against a persistent index keep exactly the rows drop_duplicates keeps
+    # on the concatenated loads
+    index_directory = os.path.join(directory, 'index')
+    kept = []
+    for start in range(0, len(text), 5000):
+        with Fingerprint_Index(index_directory) as load_index:
+            kept.append(Duplicate_Removal(text.iloc[start:start + 5000]).duplicate_removal_incremental(load_index))
+    assert pd.concat(kept).equals(text.drop_duplicates())
+
+# Near duplicates: copies that only changed their price are removed, the originals are kept
+listings = data.drop_duplicates('ID').head(3000).reset_index(drop=True)
+relisted = listings.sample(500, random_state=1).assign(**{'Sale Price': lambda frame: frame['Sale Price'] + 1000})
+columns = ['ID', 'No of Bedrooms', 'No of Bathrooms', 'Flat Area (in Sqft)', 'Lot Area (in Sqft)', 'No of Floors',
+           'Zipcode', 'Latitude', 'Longitude', 'Sale Price']
+near = Duplicate_Removal(pd.concat([listings, relisted], ignore_index=True)).near_duplicate_removal(columns, threshold=0.7)
+assert near.reset_index(drop=True).equals(listings)
+
+# Fingerprint index: persistence across reopen, and a compaction interrupted after the new
+# base was written but before the merged deltas were deleted
+directory = tempfile.mkdtemp()
+index = Fingerprint_Index(directory,max_segments=100)
+index.add(np.array([10,20],dtype=np.uint64))
+index.add(np.array([25,30],dtype=np.uint64))
+
+remove = os.remove
+def crash(path):
+    raise RuntimeError("interrupted")
+os.remove = crash
+try:
+    index.compact()
+except RuntimeError:
+    pass
+finally:
+    os.remove = remove
+
+index = Fingerprint_Index(directory,max_segments=100)
+assert len(index.deltas) == 2 and index.base.size == 4
+index.add(np.array([5,40],dtype=np.uint64))
+index.compact()
+base = np.asarray(index.base)
+assert (np.diff(base.astype(np.int64)) > 0).all() and base.tolist() == [5,10,20,25,30,40]
+assert index.contains(np.array([10,20,25,30,5,40,7],dtype=np.uint64)).tolist() == [True]*6 + [False]
+assert Fingerprint_Index(directory).contains(np.array([30,31],dtype=np.uint64)).tolist() == [True,False]
+shutil.rmtree(directory)
+
+print("All duplicate checks passed.")
@@ -1,9 +1,16 @@
+from copy_on_write import copy_on_write_step
+
+
 class Duplicate_Removal:
 
-    def __init__(self,data):
+    def __init__(self,data,copy_on_write=False):
         self.data = data
+        self.copy_on_write = copy_on_write
+        self.allocated_bytes = None
+        self.allocation_log = []
 
-    def duplicate_removal(self):
+    @copy_on_write_step
+    def duplicate_removal(self,subset=None,keep='first'):
         """
             Removes duplicate rows from the dataset.
 
@@ -11,12 +18,526 @@ class Duplicate_Removal:
             retaining the first occurrence of each duplicate. It modifies the DataFrame
             in place and returns the cleaned DataFrame.
 
+            Parameters:
+                subset (list, optional): Columns that identify a duplicate, e.g.
+                    ['ID', 'Date House was Sold']. Defaults to all columns.
+                keep (str or bool): 'first', 'last', or False to drop every copy.
+
             Returns:
                 pd.DataFrame: The DataFrame after removing duplicate rows.
         """
-        self.data = self.data.drop_duplicates()
+        duplicated = self.data.duplicated(subset=subset,keep=keep).to_numpy()
+        # Without duplicates the frame is kept as is instead of being copied
+        if duplicated.any():
+            self.data = self.data[~duplicated]
+        return self.data
+
+    @copy_on_write_step
+    def duplicate_removal_incremental(self,index,subset=None):
+        """
+            Removes rows already seen in earlier loads, then records the new rows in the index.
+
+            Duplicates inside the batch are dropped first (keeping the first occurrence), then
+            every remaining row whose fingerprint is in `index` is dropped, and the fingerprints
+            of the rows that are kept are appended to `index`.
+
+            Parameters:
+                index (Fingerprint_Index or str): The persistent index, or its directory.
+                subset (list, optional): Columns that identify a duplicate. Defaults to all columns.
+
+            Returns:
+                pd.DataFrame: The rows of the batch that were never seen before.
+
+            Notes:
+            - Fingerprints depend on the column dtypes, so load every batch with the same
+              dtypes (e.g. `pd.read_csv(..., dtype=str)`).
+        """
+        if isinstance(index,str):
+            index = Fingerprint_Index(index)
+
+        fingerprints = self.row_fingerprints(self.data,subset)
+        keep = ~self.data.duplicated(subset=subset).to_numpy()
+        keep[keep] = ~index.contains(fingerprints[keep])
+        if not keep.all():
+            self.data = self.data[keep]
+        index.add(fingerprints[keep])
+        return self.data
+
+    @staticmethod
+    def _minhash_bands(tokens,multipliers,offsets,bands):
+        """
+            MinHash signature of every row of `tokens`, folded into one bucket key per band.
+
+            Returns:
+                np.ndarray: uint64 array of shape (rows, bands).
+        """
+        import numpy as np
+
+        rows_per_band = multipliers.size // bands
+        keys = np.zeros((tokens.shape[0],bands),dtype=np.uint64)
+        for permutation,(multiplier,offset) in enumerate(zip(multipliers,offsets)):
+            # Odd multipliers make x*a+b (mod 2**64) a permutation of the 64-bit tokens
+            signature = (tokens*multiplier + offset).min(axis=1)
+            band = permutation // rows_per_band
+            keys[:,band] = keys[:,band]*np.uint64(0x100000001b3) + signature
+        return keys
+
+    def _row_tokens(self,columns,quantize=None,prefix=None):
+        """
+            One 64-bit token per row and column, after quantizing numeric columns to
+            `quantize[column]` steps and cutting text columns to their `prefix[column]` first
+            characters. Tokens of different columns never collide on purpose, so a row is the set
+            of its tokens and two rows share a token exactly where a column matches.
+        """
+        import numpy as np
+        import pandas as pd
+
+        quantize = quantize or {}
+        prefix = prefix or {}
+        tokens = np.empty((len(self.data),len(columns)),dtype=np.uint64)
+        for position,column in enumerate(columns):
+            values = self.data[column]
+            if column in quantize:
+                values = np.floor(pd.to_numeric(values,errors='coerce')/quantize[column])
+            if column in prefix:
+                values = values.astype(str).str[:prefix[column]]
+            salt = pd.util.hash_array(np.array([column],dtype=object))[0]
+            tokens[:,position] = pd.util.hash_array(np.asarray(values,dtype=object)) ^ salt
+        return tokens
+
+    @copy_on_write_step
+    def near_duplicate_removal(self,columns,threshold=0.7,quantize=None,prefix=None,num_perm=64,bands=16,chunksize=100000,n_jobs=1,random_state=0):
+        """
+            Removes near-duplicate rows, e.g. re-listed houses whose price, visits or sale date
+            changed but whose location, areas and ID prefix did not.
+
+            Every row is turned into a set of tokens, one per column of `columns` (see
+            `quantize` and `prefix`), and two rows are near-duplicates when the Jaccard
+            similarity of their sets reaches `threshold`. Candidates are found with MinHash and
+            locality-sensitive hashing: the signatures are computed in chunks of `chunksize`
+            rows, split into `bands` bands, and rows sharing a band bucket are compared with the
+            first row of that bucket only, so the work grows linearly with the number of rows.
+            Verified pairs are joined into clusters and only the first row of every cluster is
+            kept.
+
+            Parameters:
+                columns (list): Columns compared between rows.
+                threshold (float): Minimal Jaccard similarity of two near-duplicates. With m
+                    columns, rows matching on s of them have a similarity of s/(2m-s).
+                quantize (dict, optional): Step per numeric column, e.g. {'Latitude': 0.001,
+                    'Flat Area (in Sqft)': 50}. Values in the same step match.
+                prefix (dict, optional): Number of leading characters compared per column,
+                    e.g. {'ID': 6}.
+                num_perm (int): Number of MinHash permutations, a multiple of `bands`.
+                bands (int): Number of LSH bands. More bands find pairs of lower similarity.
+                chunksize (int): Rows hashed per parallel task.
+                n_jobs (int): Number of parallel workers, -1 for all cores.
+                random_state (int): Seed of the MinHash permutations.
+
+            Returns:
+                pd.DataFrame: The DataFrame without near-duplicate rows.
+
+            Notes:
+            - A row is only compared with the first row of each bucket it lands in, never with
+              the other members. Two rows of similarity J share a bucket in some band with
+              probability 1-(1-J**r)**bands, r = num_perm/bands. The pair is only found when
+              one of them is that bucket's first row, or when both are verified against the
+              same first row. So this is an upper bound on recall, and pairs just above a low
+              threshold can be missed. Verification is exact, so no pair below the threshold
+              is ever removed.
+            - Values close to a quantization step boundary can fall into different steps.
+        """
+        import numpy as np
+        from joblib import Parallel, delayed
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        n_rows = len(self.data)
+        if n_rows < 2:
+            return self.data
+
+        tokens = self._row_tokens(columns,quantize,prefix)
+        rng = np.random.default_rng(random_state)
+        multipliers = rng.integers(0,2**63,num_perm,dtype=np.uint64)*np.uint64(2) + np.uint64(1)
+        offsets = rng.integers(0,2**63,num_perm,dtype=np.uint64)
+
+        # NumPy releases the GIL in the hashing loops, so threads avoid copying the tokens
+        keys = np.concatenate(Parallel(n_jobs=n_jobs,prefer='threads')(
+            delayed(self._minhash_bands)(tokens[start:start+chunksize],multipliers,offsets,bands)
+            for start in range(0,n_rows,chunksize)))
+
+        leaders,members = [],[]
+        for band in range(bands):
+            order = np.argsort(keys[:,band],kind='stable')
+            sorted_keys = keys[order,band]
+            starts = np.r_[True,sorted_keys[1:] != sorted_keys[:-1]]
+            leader = order[starts][np.cumsum(starts)-1]
+            candidate = leader != order
+            leaders.append(leader[candidate])
+            members.append(order[candidate])
+        leaders = np.concatenate(leaders)
+        members = np.concatenate(members)
+        pairs = np.unique(leaders.astype(np.int64)*n_rows + members)
+        leaders,members = pairs // n_rows, pairs % n_rows
+
+        shared = (tokens[leaders] == tokens[members]).sum(axis=1)
+        similar = shared/(2*len(columns)-shared) >= threshold
+
+        graph = coo_matrix((np.ones(similar.sum()),(leaders[similar],members[similar])),shape=(n_rows,n_rows))
+        _,labels = connected_components(graph,directed=False)
+        keep = np.zeros(n_rows,dtype=bool)
+        keep[np.unique(labels,return_index=True)[1]] = True
+        if not keep.all():
+            self.data = self.data[keep]
         return self.data
 
+    @staticmethod
+    def row_fingerprints(data,subset=None):
+        """
+            Hashes every row (or its `subset` columns) into a 64-bit fingerprint with pandas'
+            vectorized hashing.
+
+            Returns:
+                np.ndarray: uint64 fingerprints, one per row.
+        """
+        import pandas as pd
+
+        if subset is not None:
+            data = data[subset]
+        return pd.util.hash_pandas_object(data,index=False).to_numpy()
+
+
+class Fingerprint_Set:
+    """
+        Compact set of 64-bit row fingerprints, about 8 bytes per member.
+
+        Members are kept in a few sorted uint64 runs whose sizes at least double from the newest
+        to the oldest. Adding a batch creates a new run and merges it with the runs no more than
+        twice its size, so inserting n fingerprints costs O(n log n) in total, and a batched
+        lookup is one `searchsorted` per run.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(run.size for run in self.runs)
+
+    def contains(self,fingerprints):
+        """
+            Returns a boolean array telling which of `fingerprints` are already in the set.
+        """
+        import numpy as np
+
+        fingerprints = np.asarray(fingerprints,dtype=np.uint64)
+        found = np.zeros(fingerprints.size,dtype=bool)
+        for run in self.runs:
+            position = np.minimum(np.searchsorted(run,fingerprints),run.size-1)
+            found |= run[position] == fingerprints
+        return found
+
+    def add(self,fingerprints):
+        """
+            Adds a batch of fingerprints to the set.
+        """
+        import numpy as np
+
+        run = np.unique(np.asarray(fingerprints,dtype=np.uint64))
+        run = run[~self.contains(run)]
+        if run.size == 0:
+            return self
+        while self.runs and self.runs[-1].size <= 2*run.size:
+            run = np.sort(np.concatenate([self.runs.pop(),run]),kind='stable')
+        self.runs.append(run)
+        return self
+
+
+class Streaming_Duplicate_Removal:
+    """
+        Removes duplicate rows from a CSV file larger than memory.
+
+        The file is read in chunks as text, so every value is hashed and written back exactly as
+        it appears in the file. Each row (or its `subset` columns) is reduced to a 64-bit
+        fingerprint and only fingerprints are remembered between chunks, in a `Fingerprint_Set`
+        of about 8 bytes per unique row.
+
+        - keep='first' needs a single pass.
+        - keep='last' and keep=False first count the fingerprints that occur more than once (only
+          those are stored with their counts), then drop rows in a second pass.
+
+        Parameters:
+            path (str): Path of the input CSV file.
+            subset (list, optional): Columns that identify a duplicate. Defaults to all columns.
+            keep (str or bool): 'first', 'last', or False to drop every copy.
+            chunksize (int): Number of rows read per chunk.
+
+        Notes:
+        - Rows are compared on their text, so '1' and '1.0' are different values.
+        - Two different rows share a 64-bit fingerprint with negligible probability
+          (about n**2 / 2**65 for n unique rows).
+    """
+
+    def __init__(self,path,subset=None,keep='first',chunksize=100000):
+        if keep not in ('first','last',False):
+            raise ValueError("keep must be 'first', 'last' or False")
+        self.path = path
+        self.subset = subset
+        self.keep = keep
+        self.chunksize = chunksize
+
+    def _chunks(self):
+        import pandas as pd
+
+        return pd.read_csv(self.path,dtype=str,keep_default_na=False,chunksize=self.chunksize)
+
+    def _duplicate_counts(self):
+        """
+            First pass: total number of occurrences of every fingerprint seen more than once.
+
+            Returns:
+                tuple: (fingerprints, counts) as sorted uint64 and int64 arrays.
+        """
+        import numpy as np
+
+        seen = Fingerprint_Set()
+        duplicate_fingerprints = np.empty(0,dtype=np.uint64)
+        counts = np.empty(0,dtype=np.int64)
+        for chunk in self._chunks():
+            chunk_unique,chunk_counts = np.unique(Duplicate_Removal.row_fingerprints(chunk,self.subset),return_counts=True)
+            chunk_in_seen = seen.contains(chunk_unique)
+            seen.add(chunk_unique[~chunk_in_seen])
+
+            repeated = chunk_in_seen | (chunk_counts > 1)
+            unique,chunk_counts,in_seen = chunk_unique[repeated],chunk_counts[repeated],chunk_in_seen[repeated]
+
+            position = np.minimum(np.searchsorted(duplicate_fingerprints,unique),max(counts.size-1,0))
+            counted = (duplicate_fingerprints[position] == unique) if counts.size else np.zeros(unique.size,dtype=bool)
+            np.add.at(counts,position[counted],chunk_counts[counted])
+
+            # A fingerprint seen before but not counted yet occurred exactly once so far
+            new_fingerprints = unique[~counted]
+            new_counts = chunk_counts[~counted] + in_seen[~counted]
+            duplicate_fingerprints = np.concatenate([duplicate_fingerprints,new_fingerprints])
+            counts = np.concatenate([counts,new_counts])
+            order = np.argsort(duplicate_fingerprints,kind='stable')
+            duplicate_fingerprints,counts = duplicate_fingerprints[order],counts[order]
+        return duplicate_fingerprints,counts
+
+    def transform(self,output_path):
+        """
+            Writes the de-duplicated rows to `output_path`, chunk by chunk.
+
+            Returns:
+                int: Number of rows written.
+        """
+        import pandas as pd
+        import numpy as np
+
+        if self.keep == 'first':
+            seen = Fingerprint_Set()
+        else:
+            duplicate_fingerprints,total = self._duplicate_counts()
+            passed = np.zeros(total.size,dtype=np.int64)
+
+        rows = 0
+        for i,chunk in enumerate(self._chunks()):
+            fingerprints = Duplicate_Removal.row_fingerprints(chunk,self.subset)
+
+            if self.keep == 'first':
+                keep = ~pd.Series(fingerprints).duplicated().to_numpy() & ~seen.contains(fingerprints)
+                seen.add(fingerprints[keep])
+            else:
+                position = np.minimum(np.searchsorted(duplicate_fingerprints,fingerprints),max(total.size-1,0))
+                repeated = duplicate_fingerprints[position] == fingerprints if total.size else np.zeros(fingerprints.size,dtype=bool)
+                keep = ~repeated
+                if self.keep == 'last' and repeated.any():
+                    # Occurrence number of every repeated row across the whole file
+                    index = position[repeated]
+                    occurrence = passed[index] + pd.Series(index).groupby(index).cumcount().to_numpy() + 1
+                    keep[np.flatnonzero(repeated)[occurrence == total[index]]] = True
+                    np.add.at(passed,index,1)
+
+            chunk = chunk[keep]
+            chunk.to_csv(output_path,mode='w' if i == 0 else 'a',header=(i == 0),index=False)
+            rows += chunk.shape[0]
+
+        return rows
+
+
+class Fingerprint_Index:
+    """
+        Persistent on-disk index of row fingerprints, for de-duplicating daily loads against
+        everything loaded before.
+
+        The index is a directory holding one large sorted `base.npy` array, opened memory-mapped
+        so lookups only touch the pages they need, plus small sorted `delta-*.npy` segments
+        written by `add`. Lookups are batched: the queries are sorted once and located with one
+        `searchsorted` per array. Once more than `max_segments` deltas exist, they are merged into
+        a new base in a background thread, block by block, and the new file atomically replaces
+        the old one. The thread is not a daemon, so the interpreter waits for it at exit; `close`
+        waits for it explicitly. If a compaction is still interrupted between replacing the base
+        and deleting the merged deltas, the leftover deltas only repeat values of the base: lookups
+        stay correct and the next compaction drops the repeated values.
+
+        Parameters:
+            directory (str): Directory of the index. Created if missing.
+            max_segments (int): Number of delta segments that triggers a background compaction.
+            block_size (int): Number of base fingerprints merged per block while compacting.
+    """
+
+    def __init__(self,directory,max_segments=8,block_size=1<<24):
+        import os
+        import threading
+
+        self.directory = directory
+        self.max_segments = max_segments
+        self.block_size = block_size
+        os.makedirs(directory,exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._compaction = None
+        self._load()
+
+    def _load(self):
+        import os
+        import numpy as np
+
+        base_path = os.path.join(self.directory,'base.npy')
+        self.base = np.load(base_path,mmap_mode='r') if os.path.exists(base_path) else np.empty(0,dtype=np.uint64)
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith('delta-') and name.endswith('.npy'))
+        self.deltas = [(name,np.load(os.path.join(self.directory,name))) for name in names]
+
+    def __len__(self):
+        return self.base.size + sum(delta.size for _,delta in self.deltas)
+
+    def contains(self,fingerprints):
+        """
+            Returns a boolean array telling which of `fingerprints` are already in the index.
+        """
+        import numpy as np
+
+        fingerprints = np.asarray(fingerprints,dtype=np.uint64)
+        order = np.argsort(fingerprints,kind='stable')
+        queries = fingerprints[order]
+
+        with self._lock:
+            arrays = [self.base] + [delta for _,delta in self.deltas]
+
+        found = np.zeros(queries.size,dtype=bool)
+        for array in arrays:
+            if array.size:
+                position = np.minimum(np.searchsorted(array,queries),array.size-1)
+                found |= array[position] == queries
+
+        result = np.empty(fingerprints.size,dtype=bool)
+        result[order] = found
+        return result
+
+    def add(self,fingerprints):
+        """
+            Appends the fingerprints that are not in the index yet as a new delta segment.
+
+            Returns:
+                int: Number of fingerprints added.
+        """
+        import os
+        import time
+        import numpy as np
+
+        fingerprints = np.unique(np.asarray(fingerprints,dtype=np.uint64))
+        fingerprints = fingerprints[~self.contains(fingerprints)]
+        if fingerprints.size == 0:
+            return 0
+
+        name = f'delta-{time.time_ns():020d}.npy'
+        temporary = os.path.join(self.directory,name + '.tmp')
+        with open(temporary,'wb') as file:
+            np.save(file,fingerprints)
+        os.replace(temporary,os.path.join(self.directory,name))
+        with self._lock:
+            self.deltas.append((name,fingerprints))
+
+        if len(self.deltas) > self.max_segments:
+            self.compact(background=True)
+        return int(fingerprints.size)
+
+    def compact(self,background=False):
+        """
+            Merges every delta segment into the base file.
+
+            Parameters:
+                background (bool): Run the merge in a background thread and return at once.
+                    Lookups and adds keep working on the old files meanwhile.
+        """
+        import threading
+
+        if self._compaction is not None and self._compaction.is_alive():
+            if not background:
+                self._compaction.join()
+            return
+        if background:
+            self._compaction = threading.Thread(target=self._compact)
+            self._compaction.start()
+        else:
+            self._compact()
+
+    def wait(self):
+        """
+            Blocks until a running background compaction has finished.
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+
+    def close(self):
+        """
+            Waits for a running compaction, so that the directory is left consistent.
+        """
+        self.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def _compact(self):
+        import os
+        import numpy as np
+
+        with self._lock:
+            base = self.base
+            merged = list(self.deltas)
+        if not merged:
+            return
+        delta = np.unique(np.concatenate([array for _,array in merged]))
+        # Deltas left over by an interrupted compaction repeat values of the base; the merge
+        # below needs disjoint arrays, so those values are dropped first
+        if base.size and delta.size:
+            position = np.minimum(np.searchsorted(base,delta),base.size-1)
+            delta = delta[np.asarray(base[position]) != delta]
+
+        # Every value's position in the merged array is its own position plus the number of
+        # values of the other array smaller than it, so the base is merged block by block
+        temporary = os.path.join(self.directory,'base.npy.tmp')
+        output = np.lib.format.open_memmap(temporary,mode='w+',dtype=np.uint64,shape=(base.size+delta.size,))
+        for start in range(0,base.size,self.block_size):
+            block = np.asarray(base[start:start+self.block_size])
+            output[np.arange(start,start+block.size) + np.searchsorted(delta,block)] = block
+        output[np.arange(delta.size) + np.searchsorted(base,delta)] = delta
+        output.flush()
+        del output
+
+        with self._lock:
+            os.replace(temporary,os.path.join(self.directory,'base.npy'))
+            self.base = np.load(os.path.join(self.directory,'base.npy'),mmap_mode='r')
+            names = {name for name,_ in merged}
+            self.deltas = [(name,array) for name,array in self.deltas if name not in names]
+        for name in names:
+            os.remove(os.path.join(self.directory,name))
+
+
 
 
     
@@ -1,3 +1,6 @@
+import filecmp
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 from data_visual import Data_Visualization  # Replace with actual module name if saved in a file
@@ -45,4 +48,55 @@ treemap_viz.treemap('Size', 'Labels')
 parallel_viz = Data_Visualization(df[['X', 'Y', 'Size', 'Class']])
 parallel_viz.parallel_coordinates_plot('Class')
 
-print("All plots generated and saved as .png files.")
\ No newline at end of file
+print("All plots generated and saved as .png files.")
+
+# Binned counts must match np.histogram / np.histogram2d whether the data is a frame or a CSV
+# read in chunks
+housing = pd.read_csv('Raw_Housing_Prices.csv')
+price = housing['Sale Price'].dropna().to_numpy()
+for source in (housing, 'Raw_Housing_Prices.csv'):
+    binned = Data_Visualization(source, chunksize=5000)
+    for bins in (10, [0, 1e5, 2e5, 5e5, 1e6, 1e7], 'auto'):
+        counts, edges = binned.bin_counts('Sale Price', bins=bins)
+        expected_counts, expected_edges = np.histogram(price, bins=bins)
+        assert np.array_equal(counts, expected_counts) and np.allclose(edges, expected_edges)
+    grid, x_edges, y_edges = binned.aggregate_2d('Sale Price', 'Flat Area (in Sqft)', bins=[8, 5])
+    both = housing[['Sale Price', 'Flat Area (in Sqft)']].dropna()
+    expected_grid = np.histogram2d(both['Sale Price'], both['Flat Area (in Sqft)'], bins=[8, 5])[0]
+    assert np.array_equal(grid, expected_grid)
+
+# Raster cells hold the mean / max of the values column of the rows binned into them
+grid, x_edges, y_edges = viz.aggregate_2d('X', 'Y', bins=(6, 4), values='Size', aggregate='mean')
+cells = pd.DataFrame({'x': np.clip(np.digitize(df['X'], x_edges) - 1, 0, 5),
+                      'y': np.clip(np.digitize(df['Y'], y_edges) - 1, 0, 3), 'Size': df['Size']})
+for aggregate in ('mean', 'max'):
+    grid = viz.aggregate_2d('X', 'Y', bins=(6, 4), values='Size', aggregate=aggregate)[0]
+    expected = cells.groupby(['x', 'y'])['Size'].agg(aggregate).unstack().reindex(index=range(6), columns=range(4))
+    assert np.allclose(grid, expected.to_numpy(), equal_nan=True)
+
+# An all-NaN column bins like an empty np.histogram instead of failing
+counts, edges = Data_Visualization(pd.DataFrame({'X': [np.nan] * 5})).bin_counts('X')
+assert not counts.any() and np.array_equal(edges, np.histogram([])[1])
+print("All binning checks passed.")
+
+# The render cache returns the same image until a column the plot uses changes
+with tempfile.TemporaryDirectory() as directory:
+    cached_viz = Data_Visualization(df.copy(), cache_dir=directory)
+    image = cached_viz.render_bytes('histogram', 'X')
+    cached_viz.data['Y'] = cached_viz.data['Y'] + 1
+    assert cached_viz.render_bytes('histogram', 'X') == image and cached_viz.cache.hits == 1
+    cached_viz.data['X'] = cached_viz.data['X'] + 1
+    assert cached_viz.render_bytes('histogram', 'X') != image and cached_viz.cache.hits == 1
+
+# render_batch workers share the render cache with the parent, under the parent's keys
+with tempfile.TemporaryDirectory() as directory:
+    cached_viz = Data_Visualization(df, cache_dir=os.path.join(directory, 'cache'))
+    specs = [{'method': 'histogram', 'args': ['X'], 'output_path': os.path.join(directory, 'histogram.png')},
+             {'method': 'barplot', 'args': ['Category'], 'output_path': os.path.join(directory, 'barplot.png')}]
+    assert not any(result['cached'] for result in cached_viz.render_batch(specs, n_jobs=2))
+    assert all(result['cached'] for result in cached_viz.render_batch(specs, n_jobs=2))
+    cached_viz.output_path = os.path.join(directory, 'parent_barplot.png')
+    cached_viz.barplot('Category')
+    assert cached_viz.cache.hits == 1
+    assert filecmp.cmp(cached_viz.output_path, specs[1]['output_path'], shallow=False)
+print("All render cache checks passed.")
@@ -1,8 +1,28 @@
+from copy_on_write import copy_on_write_step
+
+
+def _replace_columns(data,features,columns):
+    """
+        Replaces the `features` columns of `data` with the `{name: values}` columns, appended at
+        the end. Deleting and inserting columns, unlike drop or concat, leaves the buffers of
+        the untouched columns shared, which copy_on_write_step relies on.
+    """
+    for feature in features:
+        del data[feature]
+    for name,values in columns.items():
+        data[name] = values
+    return data
+
+
 class Lable_Encoding:
 
-    def __init__(self,data):
+    def __init__(self,data,copy_on_write=False):
         self.data = data
+        self.copy_on_write = copy_on_write
+        self.allocated_bytes = None
+        self.allocation_log = []
 
+    @copy_on_write_step
     def basic_encoder(self,feature_name):
         """
                 Applies basic label encoding to a single categorical feature.
@@ -25,28 +45,72 @@ class Lable_Encoding:
 
         return temp
 
-    def hot_encoder(self,feature_name):
+    @copy_on_write_step
+    def hot_encoder(self,feature_name,top_k=None,sparse_matrix=False,other_label='other'):
         """
-            Applies one-hot encoding to a single categorical feature.
+            Applies one-hot encoding to one or more categorical features.
+
+            Every feature is factorized once and its categories are counted from the codes, so
+            the top-k limit costs no extra pass. The indicators are stored sparse with uint8
+            values: either as pandas Sparse columns named `<feature>_<category>` that replace the
+            feature, or as a SciPy CSR matrix that can be passed straight to sklearn models.
 
             Parameters:
             -----------
-            feature_name : str
-                The name of the feature/column to encode.
+            feature_name : str or list
+                The name(s) of the feature/column(s) to encode.
+            top_k : int, optional
+                Keep only the `top_k` most frequent categories of every feature; the other
+                categories share one `<feature>_<other_label>` column.
+            sparse_matrix : bool
+                Return a CSR matrix instead of changing the DataFrame. Its column names are
+                stored in `self.hot_feature_names`.
+            other_label : str
+                Name of the category that collects the rare categories.
 
             Returns:
             --------
-            pandas.DataFrame
-                DataFrame with one-hot encoded columns.
+            pandas.DataFrame or scipy.sparse.csr_matrix
+                DataFrame with one-hot encoded columns, or the CSR matrix of indicators.
+                Missing values get no indicator.
         """
-        temp = self.data
-        from sklearn.preprocessing import OneHotEncoder
-
-        h_encoder = OneHotEncoder(sparse_output=False) 
-        temp[feature_name] = h_encoder.fit_transform(temp[feature_name])
-
-        return temp
+        import numpy as np
+        import pandas as pd
+        from scipy import sparse
 
+        temp = self.data
+        features = [feature_name] if isinstance(feature_name,str) else list(feature_name)
+        n_rows = len(temp)
+
+        blocks = []
+        names = []
+        for feature in features:
+            codes,uniques = pd.factorize(temp[feature],sort=True)
+            counts = np.bincount(codes[codes>=0],minlength=len(uniques))
+
+            column_of = np.arange(len(uniques))
+            categories = list(uniques)
+            if top_k is not None and top_k < len(uniques):
+                kept = np.sort(np.argsort(-counts,kind='stable')[:top_k])
+                column_of = np.full(len(uniques),top_k)
+                column_of[kept] = np.arange(top_k)
+                categories = [uniques[code] for code in kept] + [other_label]
+
+            present = codes >= 0
+            rows = np.flatnonzero(present)
+            blocks.append(sparse.csr_matrix((np.ones(rows.size,dtype=np.uint8),(rows,column_of[codes[present]])),
+                                            shape=(n_rows,len(categories))))
+            names += [f'{feature}_{category}' for category in categories]
+
+        matrix = sparse.hstack(blocks,format='csr',dtype=np.uint8)
+        self.hot_feature_names = names
+        if sparse_matrix:
+            return matrix
+
+        hot = pd.DataFrame.sparse.from_spmatrix(matrix,index=temp.index,columns=names)
+        return _replace_columns(temp,features,{name:hot[name] for name in names})
+
+    @copy_on_write_step
     def manual_encoder(self,feature_name):
         """
             Placeholder for manual encoding using a custom dictionary mapping.
@@ -76,6 +140,7 @@ class Lable_Encoding:
         return temp 
     
 
+    @copy_on_write_step
     def ordinal_encoding(self,feature_name,sequence):
         """
             Applies ordinal encoding with a custom sequence.
@@ -102,28 +167,71 @@ class Lable_Encoding:
         return temp 
     
 
-    def target_based_encoding(self,feature_name,target):
+    @copy_on_write_step
+    def target_based_encoding(self,feature_name,target,n_folds=5,smoothing=10.0,random_state=0,n_jobs=1):
         """
-            Encodes the feature using the mean of the target variable.
+            Encodes one or more features by the smoothed mean of the target variable, computed
+            out of fold so that no row sees its own target.
+
+            The rows are split into `n_folds` random folds and every row gets the statistics of
+            its category in the other folds,
+            (sum + smoothing*prior) / (count + smoothing), with the prior being the target mean
+            of the other folds. The per-fold sums and counts of a feature come from a single
+            aggregation over (fold, category); the other-folds statistics are the totals minus
+            the fold's own. Features are encoded in parallel processes when `n_jobs` != 1.
+
+            The statistics of the full data are kept in `self.target_encoding` to encode new
+            data at serving time.
 
             Parameters:
             -----------
-            feature_name : str
-                The categorical feature to encode.
+            feature_name : str or list
+                The categorical feature(s) to encode.
             target : str
                 The target variable name used for encoding.
+            n_folds : int
+                Number of folds.
+            smoothing : float
+                Weight of the prior, in rows. Rare categories are pulled towards the prior.
+            random_state : int
+                Seed of the fold assignment.
+            n_jobs : int
+                Number of worker processes, -1 for all cores.
 
             Returns:
             --------
             pandas.DataFrame
             DataFrame with target-encoded feature.
+
+            Notes:
+            - Rows with a missing target are not counted; missing categories get the prior.
         """
+        import numpy as np
+        import pandas as pd
+        from joblib import Parallel, delayed
+
         temp = self.data
-        mean_target = temp.groupby(feature_name)[target].mean()
-        temp[feature_name] = temp[feature_name].map(mean_target)
+        features = [feature_name] if isinstance(feature_name,str) else list(feature_name)
+
+        vocabulary,codes = self._fit_codes(features)
+        y = temp[target].to_numpy(dtype=float)
+        folds = np.random.default_rng(random_state).permutation(len(temp)) % n_folds
+
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_out_of_fold_means)(codes[feature],y,folds,n_folds,len(vocabulary.categories[feature]),smoothing)
+            for feature in features)
+
+        means = {}
+        for feature,(encoded,category_means) in zip(features,results):
+            temp[feature] = encoded
+            means[feature] = category_means
+        valid = ~np.isnan(y)
+        self.target_encoding = Target_Encoding(vocabulary,means,float(y[valid].mean()) if valid.any() else float('nan'))
+        self.data = temp
         return temp
     
 
+    @copy_on_write_step
     def frequency_encoding(self,feature_name):
         """
             Encodes categories by their frequency in the dataset.
@@ -144,55 +252,524 @@ class Lable_Encoding:
         return temp
     
 
+    @copy_on_write_step
     def binary_encoder(self,feature_name):
         """
-            Applies binary encoding to a categorical feature.
+            Applies binary encoding to one or more categorical features.
+
+            Every feature is factorized and the bits of its codes are unpacked into uint8
+            columns `<feature>_0`, `<feature>_1`, ... (most significant bit first), which replace
+            the feature. Code 0 is kept for missing values, so k categories need
+            bit_length(k) columns.
 
             Parameters:
             -----------
-            feature_name : str
-                The name of the feature/column to encode.
+            feature_name : str or list
+                The name(s) of the feature/column(s) to encode.
 
             Returns:
             --------
             pandas.DataFrame
                 DataFrame with binary encoded columns.
         """
+        import numpy as np
+        import pandas as pd
 
-        import category_encoders as ce
+        temp = self.data
+        features = [feature_name] if isinstance(feature_name,str) else list(feature_name)
+
+        encoded = {}
+        for feature in features:
+            codes,uniques = pd.factorize(temp[feature],sort=True)
+            codes = (codes+1).astype('>u4')
+            n_bits = max(1,len(uniques).bit_length())
+            bits = np.unpackbits(codes.view(np.uint8).reshape(-1,4),axis=1)[:,32-n_bits:]
+            for bit in range(n_bits):
+                encoded[f'{feature}_{bit}'] = bits[:,bit]
+
+        return _replace_columns(temp,features,encoded)
+    
+
+    @copy_on_write_step
+    def hash_encoding(self,feature_name,n_components=3,prefix=None):
+
+        """
+            Applies hashing encoding to one or more categorical features using a fixed number
+            of components.
+
+            The values of every feature are hashed with pandas' vectorized hashing and taken
+            modulo `n_components`; column `<prefix>_<i>` counts how many of the features of a row
+            fell into bucket i. The uint8 columns replace the features.
+
+            Parameters:
+            -----------
+            feature_name : str or list
+                The name(s) of the feature/column(s) to encode.
+            n_components : int
+                Number of hash buckets. Default is 3.
+            prefix : str, optional
+                Prefix of the output columns. Defaults to 'hash_' followed by the feature names
+                joined with '_', so encoding other features later adds distinct columns.
+
+            Returns:
+            --------
+            pandas.DataFrame
+                DataFrame with hash encoded columns.
+
+            Notes:
+            - The hash depends on the dtype, so 1 and '1' fall into different buckets.
+        """
+        import numpy as np
+        import pandas as pd
 
         temp = self.data
+        features = [feature_name] if isinstance(feature_name,str) else list(feature_name)
 
-        encoder = ce.BinaryEncoder(cols=['Category'])
+        if prefix is None:
+            prefix = 'hash_' + '_'.join(features)
 
-        temp[feature_name] = encoder.fit_transform(temp[feature_name])
+        # One contiguous row per bucket, so every output column is inserted without a copy
+        counts = np.zeros((n_components,len(temp)),dtype=np.uint8)
+        rows = np.arange(len(temp))
+        for feature in features:
+            buckets = pd.util.hash_array(temp[feature].to_numpy()) % np.uint64(n_components)
+            counts[buckets.astype(np.intp),rows] += 1
+
+        return _replace_columns(temp,features,{f'{prefix}_{i}':counts[i] for i in range(n_components)})
 
-        return temp
     
 
-    def hash_encoding(self,feature_name):
+    def fit(self,columns,sequence=None):
+        """
+            Learns the categories of several columns, so that later batches and single records
+            can be encoded with the same codes.
 
+            Parameters:
+            -----------
+            columns : str or list
+                The features to learn.
+            sequence : dict, optional
+                Ordered categories per column, e.g. {'Condition of the House': ['Bad', 'Okay',
+                'Fair', 'Good', 'Excellent']}. Other columns get their sorted unique values.
+
+            Returns:
+            --------
+            Label_Vocabulary
+                The learned categories of every column.
+        """
+        return self._fit_codes(columns,sequence)[0]
+
+    @copy_on_write_step
+    def encode(self,columns,vocabulary=None,sequence=None):
         """
-            Applies hashing encoding to a categorical feature using a fixed number of components.
+            Replaces several categorical features by integer codes.
+
+            Without `vocabulary` the categories are learned and the codes produced by the
+            same pass over every column; the learned vocabulary is kept in `self.vocabulary`.
 
             Parameters:
             -----------
-            feature_name : str
-                The name of the feature/column to encode.
+            columns : str or list
+                The features to encode.
+            vocabulary : Label_Vocabulary, optional
+                A vocabulary fitted earlier, which must contain every one of `columns`. Unseen
+                and missing values get the code -1.
+            sequence : dict, optional
+                Ordered categories per column, see `fit`.
 
             Returns:
             --------
             pandas.DataFrame
-                DataFrame with hash encoded columns.
-        """
-        import category_encoders as ce
+                DataFrame with the encoded features.
 
+            Raises:
+            -------
+            ValueError
+                If `vocabulary` has no categories for some of `columns`.
+        """
         temp = self.data
+        if vocabulary is None:
+            self.vocabulary,codes = self._fit_codes(columns,sequence)
+            for column,column_codes in codes.items():
+                temp[column] = column_codes
+        else:
+            if isinstance(columns,str):
+                columns = [columns]
+            unknown = [column for column in columns if column not in vocabulary.categories]
+            if unknown:
+                raise ValueError(f"The vocabulary has no categories for {unknown}")
+            self.vocabulary = vocabulary
+            for column in columns:
+                temp[column] = vocabulary.transform_column(column,temp[column])
+        self.data = temp
+        return temp
+
+    def _fit_codes(self,columns,sequence=None):
+        import pandas as pd
+
+        if isinstance(columns,str):
+            columns = [columns]
+        sequence = sequence or {}
+
+        categories = {}
+        codes = {}
+        for column in columns:
+            values = self.data[column]
+            if column in sequence:
+                categories[column] = list(sequence[column])
+                continue
+            if isinstance(values.dtype,pd.CategoricalDtype):
+                # Category columns already hold their codes
+                column_codes,uniques = values.cat.codes.to_numpy(),values.cat.categories
+            else:
+                try:
+                    column_codes,uniques = pd.factorize(values,sort=True)
+                except TypeError:
+                    # Mixed types cannot be sorted, they keep their order of appearance
+                    column_codes,uniques = pd.factorize(values)
+            if isinstance(uniques,pd.DatetimeIndex):
+                # Dates are kept as ISO strings so that the vocabulary stays JSON serializable
+                categories[column] = [value.isoformat() for value in uniques]
+            else:
+                categories[column] = list(uniques.tolist())
+            codes[column] = column_codes.astype(Label_Vocabulary.code_dtype(len(uniques)))
+
+        vocabulary = Label_Vocabulary(categories)
+        for column in columns:
+            if column not in codes:
+                codes[column] = vocabulary.transform_column(column,self.data[column])
+        return vocabulary,codes
+
+
+def _out_of_fold_means(codes,y,folds,n_folds,n_categories,smoothing):
+    """
+        Out-of-fold smoothed target means of one factorized feature.
+
+        Returns:
+        --------
+        tuple
+            The encoded rows, and the smoothed means of every category over the full data.
+    """
+    import numpy as np
+
+    valid = (~np.isnan(y)) & (codes >= 0)
+    key = folds[valid]*n_categories + codes[valid]
+    size = n_folds*n_categories
+    sums = np.bincount(key,weights=y[valid],minlength=size).reshape(n_folds,n_categories)
+    counts = np.bincount(key,minlength=size).reshape(n_folds,n_categories)
+
+    observed = ~np.isnan(y)
+    fold_sums = np.bincount(folds[observed],weights=y[observed],minlength=n_folds)
+    fold_counts = np.bincount(folds[observed],minlength=n_folds)
+
+    total_sums = sums.sum(axis=0)
+    total_counts = counts.sum(axis=0)
+    # Statistics of the other folds, obtained by subtraction instead of one groupby per fold
+    priors = (fold_sums.sum()-fold_sums)/np.maximum(fold_counts.sum()-fold_counts,1)
+    other_means = ((total_sums-sums) + smoothing*priors[:,None])/((total_counts-counts) + smoothing)
+
+    encoded = priors[folds]
+    known = codes >= 0
+    encoded[known] = other_means[folds[known],codes[known]]
+
+    prior = fold_sums.sum()/max(fold_counts.sum(),1)
+    return encoded,(total_sums + smoothing*prior)/(total_counts + smoothing)
+
+
+class Label_Vocabulary:
+    """
+        Fitted categories of one or more columns, produced by `Lable_Encoding.fit`.
+
+        Each column is stored as the list of its categories, the code of a category being its
+        position in the list, so the object can be stored with `to_json` and restored with
+        `from_json`. New frames are encoded with one hash-table lookup per value through a cached
+        `pd.Index`, single records through a plain dict. Unseen and missing values get the code
+        -1, the code pandas uses for missing categories. Datetime categories are stored as ISO
+        strings and datetime values are matched against them as dates.
+    """
+
+    unknown_code = -1
+
+    def __init__(self,categories):
+        self.categories = categories
+        self.columns = list(categories)
+        self._indexes = {}
+        self._lookups = {}
+
+    @staticmethod
+    def code_dtype(n_categories):
+        import numpy as np
+
+        for dtype in (np.int8,np.int16,np.int32):
+            if n_categories < np.iinfo(dtype).max:
+                return dtype
+        return np.int64
+
+    def to_dict(self):
+        return {column:list(values) for column,values in self.categories.items()}
+
+    @classmethod
+    def from_dict(cls,categories):
+        return cls({column:list(values) for column,values in categories.items()})
+
+    def to_json(self):
+        import json
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls,text):
+        import json
+        return cls.from_dict(json.loads(text))
+
+    def transform_column(self,column,values):
+        """
+            Encodes one column of values (any array-like) with the categories of `column`.
 
-        encoder = ce.HashingEncoder(cols = ['Category'], n_components = 3)
+            Returns:
+            --------
+            numpy.ndarray
+                The codes, in the smallest integer dtype that holds them.
+        """
+        import pandas as pd
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            key = (column,'datetime')
+            if key not in self._indexes:
+                self._indexes[key] = pd.DatetimeIndex(pd.to_datetime(pd.Index(self.categories[column],dtype=object),errors='coerce'))
+            index = self._indexes[key]
+        else:
+            if column not in self._indexes:
+                self._indexes[column] = pd.Index(self.categories[column])
+            index = self._indexes[column]
+        codes = index.get_indexer(values)
+        return codes.astype(self.code_dtype(len(self.categories[column])))
+
+    def transform(self,data):
+        """
+            Encodes a new batch.
 
-        temp[feature_name] = encoder.fit_transform(temp[feature_name])
+            Parameters:
+            -----------
+            data : pandas.DataFrame or dict
+                A frame containing the fitted columns, or a single record mapping column names
+                to values.
+
+            Returns:
+            --------
+            pandas.DataFrame or dict
+                The encoded frame, or a new encoded record.
+        """
+        if isinstance(data,dict):
+            return self._transform_record(data)
+        for column in self.columns:
+            data[column] = self.transform_column(column,data[column])
+        return data
+
+    def _transform_record(self,record):
+        import datetime
+        import numpy as np
+        import pandas as pd
+
+        record = dict(record)
+        for column in self.columns:
+            if column not in self._lookups:
+                self._lookups[column] = {value:code for code,value in enumerate(self.categories[column])}
+            value = record[column]
+            if pd.isna(value):
+                record[column] = self.unknown_code
+            else:
+                if isinstance(value,(datetime.datetime,np.datetime64)):
+                    value = pd.Timestamp(value).isoformat()
+                record[column] = self._lookups[column].get(value,self.unknown_code)
+        return record
+
+
+class Target_Encoding:
+    """
+        Smoothed target means fitted by `Lable_Encoding.target_based_encoding` on the full data.
+
+        Categories are looked up through a `Label_Vocabulary` and their means read from one
+        array per feature; unseen and missing categories get the global target mean (`prior`).
+    """
+
+    def __init__(self,vocabulary,means,prior):
+        import numpy as np
+
+        self.vocabulary = vocabulary
+        self.columns = vocabulary.columns
+        self.prior = prior
+        # The last slot holds the prior, so the unknown code -1 selects it
+        self.means = {column:np.append(np.asarray(values,dtype=float),prior) for column,values in means.items()}
+
+    def to_dict(self):
+        return {'categories':self.vocabulary.to_dict(),'prior':self.prior,
+                'means':{column:values[:-1].tolist() for column,values in self.means.items()}}
+
+    @classmethod
+    def from_dict(cls,statistics):
+        return cls(Label_Vocabulary.from_dict(statistics['categories']),statistics['means'],float(statistics['prior']))
+
+    def to_json(self):
+        import json
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls,text):
+        import json
+        return cls.from_dict(json.loads(text))
+
+    def transform(self,data):
+        """
+            Encodes a new batch.
+
+            Parameters:
+            -----------
+            data : pandas.DataFrame or dict
+                A frame containing the fitted columns, or a single record mapping column names
+                to values.
+
+            Returns:
+            --------
+            pandas.DataFrame or dict
+                The encoded frame, or a new encoded record.
+        """
+        if isinstance(data,dict):
+            codes = self.vocabulary.transform(data)
+            record = dict(data)
+            for column in self.columns:
+                record[column] = float(self.means[column][codes[column]])
+            return record
+        for column in self.columns:
+            data[column] = self.means[column][self.vocabulary.transform_column(column,data[column])]
+        return data
+
+
+def _count_file(path,keys,chunksize,counter_options):
+    """
+        Counts the keys of one CSV file, see `Streaming_Frequency_Encoding.fit`.
+    """
+    import pandas as pd
+    from sketches import Frequency_Counter
+
+    counters = {name:Frequency_Counter(**counter_options) for name in keys}
+    columns = sorted({column for key in keys.values() for column in key})
+    for chunk in pd.read_csv(path,usecols=columns,dtype=str,chunksize=chunksize):
+        for name,key in keys.items():
+            hashes,present = Streaming_Frequency_Encoding.key_hashes(chunk,key)
+            counters[name].update(hashes[present])
+    return counters
+
+
+class Streaming_Frequency_Encoding:
+    """
+        Out-of-core frequency encoding of high-cardinality columns spread over one or more CSV
+        files.
+
+        The first pass (`fit`) streams the files in chunks and counts every key with a
+        `Frequency_Counter`: exactly while the number of distinct values stays under
+        `max_exact`, with a count-min sketch of fixed size beyond it. Files are counted in
+        parallel processes and their counters merged. The second pass (`transform`) reads a file
+        again chunk by chunk and replaces every key by its count.
+
+        Parameters:
+        -----------
+        paths : str or list
+            Path(s) of the input CSV file(s).
+        columns : list
+            Columns to encode. A tuple of columns, e.g. ('Zipcode', 'Overall Grade'), encodes the
+            combination and adds it as a new column named after its parts.
+        chunksize : int
+            Number of rows read per chunk.
+        max_exact : int
+            Largest number of distinct values per key counted exactly.
+        epsilon : float
+            Overcount bound of the sketches, relative to the number of rows.
+
+        Notes:
+        - Values are compared as read from the file (as strings), so '98178' and '98178.0' are
+          different values. Missing values are not counted and encoded as NaN.
+    """
+
+    def __init__(self,paths,columns,chunksize=100000,max_exact=1000000,epsilon=1e-5):
+        self.paths = [paths] if isinstance(paths,str) else list(paths)
+        self.keys = {}
+        for column in columns:
+            key = (column,) if isinstance(column,str) else tuple(column)
+            self.keys['_'.join(key)] = key
+        self.chunksize = chunksize
+        self.counter_options = {'max_exact':max_exact,'epsilon':epsilon}
+        self.counters = None
+
+    @staticmethod
+    def key_hashes(chunk,key):
+        """
+            64-bit hashes of the values of `key` in a chunk read as strings, and a mask of the
+            rows where none of them is missing.
+        """
+        import numpy as np
+        import pandas as pd
+
+        values = chunk[list(key)]
+        present = values.notna().all(axis=1).to_numpy()
+        if len(key) == 1:
+            hashes = pd.util.hash_array(values.iloc[:,0].to_numpy(dtype=object))
+        else:
+            hashes = pd.util.hash_pandas_object(values,index=False).to_numpy()
+        return np.asarray(hashes,dtype=np.uint64),present
+
+    def fit(self,n_jobs=1):
+        """
+            First pass: counts every key over all files.
 
-        return temp    
+            Parameters:
+            -----------
+            n_jobs : int
+                Number of worker processes, one file per task. -1 for all cores.
 
-    
\ No newline at end of file
+            Returns:
+            --------
+            dict
+                The `Frequency_Counter` of every key, also kept in `self.counters`.
+        """
+        from joblib import Parallel, delayed
+
+        results = Parallel(n_jobs=n_jobs)(delayed(_count_file)(path,self.keys,self.chunksize,self.counter_options)
+                                          for path in self.paths)
+        counters = results[0]
+        for other in results[1:]:
+            for name in counters:
+                counters[name].merge(other[name])
+        self.counters = counters
+        return counters
+
+    def transform(self,output_path,path=None):
+        """
+            Second pass: writes `path` (the first input file by default) with every key replaced
+            by its count.
+
+            Returns:
+            --------
+            int
+                Number of rows written.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if self.counters is None:
+            self.fit()
+        path = self.paths[0] if path is None else path
+        columns = {column for key in self.keys.values() for column in key}
+
+        rows = 0
+        for i,chunk in enumerate(pd.read_csv(path,dtype={column:str for column in columns},chunksize=self.chunksize)):
+            encoded = {}
+            for name,key in self.keys.items():
+                hashes,present = self.key_hashes(chunk,key)
+                counts = self.counters[name].query(hashes).astype(float)
+                counts[~present] = np.nan
+                encoded[name] = counts
+            for name,counts in encoded.items():
+                chunk[name] = counts
+            chunk.to_csv(output_path,mode='w' if i==0 else 'a',header=(i==0),index=False)
+            rows += len(chunk)
+        return rows
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from label_encoding import Lable_Encoding,Label_Vocabulary,Streaming_Frequency_Encoding
+
+data = pd.read_csv('Raw_Housing_Prices.csv')
+original = data.copy()
+categorical = ['Condition of the House','Zipcode','Waterfront View']
+
+# A fitted vocabulary gives the codes of pd.factorize(sort=True), survives JSON, and maps
+# unseen values to -1
+encoder = Lable_Encoding(data.copy())
+encoded = encoder.encode(categorical)
+vocabulary = Label_Vocabulary.from_json(encoder.vocabulary.to_json())
+for column in categorical:
+    assert np.array_equal(encoded[column],pd.factorize(data[column],sort=True)[0])
+    assert np.array_equal(vocabulary.transform_column(column,data[column]),encoded[column])
+assert vocabulary.transform({'Condition of the House':'Unknown','Zipcode':98178,'Waterfront View':'No'}) == \
+    {'Condition of the House':-1,'Zipcode':int(encoded['Zipcode'][0]),'Waterfront View':int(encoded['Waterfront View'][0])}
+
+# One-hot indicators equal pd.get_dummies; in copy-on-write mode the caller's frame is kept and
+# only the new sparse columns are counted as allocated
+encoder = Lable_Encoding(data,copy_on_write=True)
+hot = encoder.hot_encoder(['Condition of the House','Zipcode'])
+expected = pd.get_dummies(data,columns=['Condition of the House','Zipcode'],dtype=np.uint8)
+assert sorted(hot.columns) == sorted(expected.columns)
+new_columns = [column for column in hot.columns if column not in data.columns]
+assert hot[new_columns].sparse.to_dense().equals(expected[new_columns])
+pd.testing.assert_frame_equal(data,original)
+assert encoder.allocated_bytes == hot[new_columns].memory_usage(index=False).sum()
+assert np.shares_memory(hot['Sale Price'].to_numpy(),data['Sale Price'].to_numpy())
+
+# Binary columns spell the sorted factorize code plus one, most significant bit first
+binary = Lable_Encoding(data.copy()).binary_encoder('Zipcode')
+bits = binary.filter(regex=r'^Zipcode_\d+$').to_numpy()
+assert np.array_equal(bits @ (1 << np.arange(bits.shape[1])[::-1]),pd.factorize(data['Zipcode'],sort=True)[0]+1)
+
+# Every row of a hash encoding counts one bucket per feature, the bucket of pandas' hash
+hashed = Lable_Encoding(data.copy()).hash_encoding(categorical,n_components=8)
+buckets = hashed.filter(like='hash_').to_numpy()
+assert (buckets.sum(axis=1) == len(categorical)).all()
+zipcode_bucket = pd.util.hash_array(data['Zipcode'].to_numpy()) % np.uint64(8)
+assert np.array_equal(Lable_Encoding(data.copy()).hash_encoding('Zipcode',n_components=8).filter(like='hash_').to_numpy().argmax(axis=1),zipcode_bucket)
+
+# Out-of-fold target encoding equals a groupby over the other folds, row by row
+n_folds,smoothing = 5,10.0
+target_encoded = Lable_Encoding(data.copy()).target_based_encoding('Zipcode','Sale Price',n_folds=n_folds,smoothing=smoothing,random_state=0)
+folds = np.random.default_rng(0).permutation(len(data)) % n_folds
+expected = np.empty(len(data))
+for fold in range(n_folds):
+    train = data[(folds != fold) & data['Sale Price'].notna().to_numpy()]
+    prior = train['Sale Price'].mean()
+    statistics = train.groupby('Zipcode')['Sale Price'].agg(['sum','count'])
+    means = (statistics['sum'] + smoothing*prior)/(statistics['count'] + smoothing)
+    expected[folds == fold] = data['Zipcode'][folds == fold].map(means).fillna(prior).to_numpy()
+assert np.allclose(target_encoded['Zipcode'],expected)
+
+# Streamed frequency counts equal value_counts of the values as read from the file, exactly
+# while they fit and never below them once the sketch takes over
+with tempfile.TemporaryDirectory() as directory:
+    output_path = os.path.join(directory,'encoded.csv')
+    text = pd.read_csv('Raw_Housing_Prices.csv',dtype=str)
+    for max_exact in (1000000,10):
+        streaming = Streaming_Frequency_Encoding('Raw_Housing_Prices.csv',['Zipcode',('Zipcode','Overall Grade')],
+                                                 chunksize=5000,max_exact=max_exact,epsilon=1e-3)
+        assert streaming.transform(output_path) == len(data)
+        counts = pd.read_csv(output_path)
+        expected = text['Zipcode'].map(text['Zipcode'].value_counts())
+        pairs = text.groupby(['Zipcode','Overall Grade'])['Zipcode'].transform('size')
+        if max_exact > len(data):
+            assert counts['Zipcode'].equals(expected.astype(float))
+            assert counts['Zipcode_Overall Grade'].equals(pairs.astype(float))
+        else:
+            assert (counts['Zipcode'].isna() == expected.isna()).all() and (counts['Zipcode'] >= expected).sum() == expected.count()
+
+print("All encoding checks passed.")
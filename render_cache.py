@@ -0,0 +1,195 @@
+def _used_columns(data,args,kwargs,all_columns=False):
+    '''
+        Returns the columns of `data` named in the plot arguments, or all columns when none
+        is named or the plot is declared to use them all (e.g. `parallel_coordinates_plot`).
+    '''
+    if all_columns:
+        return list(data.columns)
+    columns = []
+    for value in list(args) + list(kwargs.values()):
+        names = value if isinstance(value,(list,tuple)) else [value]
+        for name in names:
+            if isinstance(name,str) and name in data.columns and name not in columns:
+                columns.append(name)
+    return columns or list(data.columns)
+
+
+def data_fingerprint(data,args=(),kwargs=None,all_columns=False):
+    '''
+        Fast fingerprint of the part of `data` a plot uses.
+
+        The used columns (all of them with `all_columns`) are hashed row by row with pandas' vectorized hashing (index
+        included, so plots against the row position are covered) and the row hashes are
+        digested with BLAKE2. A CSV path is fingerprinted by its size and modification time.
+
+        Returns:
+            bytes: A 16-byte digest.
+    '''
+    import hashlib
+    import os
+    import pandas as pd
+
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data,str):
+        stat = os.stat(data)
+        digest.update(f'{os.path.abspath(data)}|{stat.st_size}|{stat.st_mtime_ns}'.encode())
+        return digest.digest()
+
+    for column in _used_columns(data,args,kwargs or {},all_columns):
+        digest.update(f'{column}|{data[column].dtype}|'.encode())
+        digest.update(pd.util.hash_pandas_object(data[column],index=True).to_numpy().tobytes())
+    return digest.digest()
+
+
+class Render_Cache:
+    '''
+        Content-addressed on-disk cache of rendered plots.
+
+        Every image is stored as `<key>.png`, the key being a digest of the plot method, its
+        arguments and the fingerprint of the data it uses, so an unchanged plot is found again
+        without rendering. Hits refresh the file's modification time, and once the directory
+        grows beyond `max_bytes` the least recently used images are deleted.
+
+        Parameters:
+            directory (str): Directory of the cached images. Created if missing.
+            max_bytes (int): Size bound of the directory.
+    '''
+
+    def __init__(self,directory,max_bytes=256*2**20):
+        import os
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory,exist_ok=True)
+
+    def key(self,method_name,data,args,kwargs,all_columns=False):
+        import hashlib
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{method_name}|{args!r}|{sorted(kwargs.items())!r}|'.encode())
+        digest.update(data_fingerprint(data,args,kwargs,all_columns))
+        return digest.hexdigest()
+
+    def path(self,key):
+        import os
+        return os.path.join(self.directory,f'{key}.png')
+
+    def get(self,key):
+        '''
+            Returns the path of the cached image of `key`, or None.
+        '''
+        import os
+
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def get_bytes(self,key):
+        '''
+            Returns the cached image of `key` as bytes, or None.
+        '''
+        path = self.get(key)
+        if path is None:
+            return None
+        with open(path,'rb') as file:
+            return file.read()
+
+    def put(self,key,rendered_path):
+        '''
+            Moves a freshly rendered image into the cache, then evicts the least recently used
+            other images beyond `max_bytes`. The new image itself is always kept, even when it
+            alone exceeds `max_bytes`.
+
+            Returns:
+                str: The path of the cached image.
+        '''
+        import os
+
+        path = self.path(key)
+        os.replace(rendered_path,path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self,keep=None):
+        import os
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.png') and entry.is_file():
+                # Other processes sharing the directory may evict it meanwhile
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns,stat.st_size,entry.path))
+        total = sum(size for _,size,_ in entries)
+        for _,size,path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def cached_render(method=None,all_columns=False):
+    '''
+        Decorator for the plot methods of `Data_Visualization`, used bare or as
+        `@cached_render(all_columns=True)` for plots that read columns they are not given as
+        arguments, so that every column is part of their cache key.
+
+        When the instance has a `cache`, the method is only run on a cache miss, into a
+        temporary file that is then moved into the cache; on a hit the cached image is used and
+        matplotlib is neither imported nor run. The method returns the cached image's path, or
+        `self.output_path` after copying the image there when it is set.
+
+        Without a cache the method runs unchanged.
+    '''
+    import functools
+
+    if method is None:
+        return functools.partial(cached_render,all_columns=all_columns)
+
+    @functools.wraps(method)
+    def render(self,*args,**kwargs):
+        cache = getattr(self,'cache',None)
+        if cache is None:
+            return method(self,*args,**kwargs)
+
+        import os
+        import shutil
+
+        # render_batch hands its workers the key computed on the original frame
+        key = getattr(self,'render_keys',{}).pop(method.__name__,None) or \
+            cache.key(method.__name__,self.data,args,kwargs,all_columns)
+        path = cache.get(key)
+        if path is None:
+            output_path = self.output_path
+            self.output_path = os.path.join(cache.directory,f'{key}.{os.getpid()}.tmp')
+            try:
+                result = method(self,*args,**kwargs)
+            finally:
+                temporary,self.output_path = self.output_path,output_path
+            if result != temporary:
+                return result
+            path = cache.put(key,temporary)
+
+        if self.output_path:
+            if os.path.dirname(self.output_path):
+                os.makedirs(os.path.dirname(self.output_path),exist_ok=True)
+            shutil.copyfile(path,self.output_path)
+            return self.output_path
+        return path
+
+    render.all_columns = all_columns
+    return render
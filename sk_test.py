@@ -0,0 +1,43 @@
+import numpy as np
+from sketches import Quantile_Sketch,Count_Min_Sketch,Frequency_Counter
+
+rng = np.random.default_rng(0)
+values = rng.lognormal(10,1,1000000)
+values[rng.random(values.size) < 0.01] = np.nan
+observed = np.sort(values[~np.isnan(values)])
+quantiles = np.linspace(0.01,0.99,99)
+
+def rank_error(sketch):
+    estimates = sketch.quantile(quantiles)
+    return np.abs(np.searchsorted(observed,estimates)/observed.size - quantiles).max()
+
+# Quantile estimates stay within epsilon in rank, streamed in chunks or merged from parts
+streamed = Quantile_Sketch(0.01,seed=0)
+for start in range(0,values.size,10000):
+    streamed.update(values[start:start+10000])
+assert streamed.count == observed.size and rank_error(streamed) <= 0.01
+assert len(streamed) < 10*streamed.k
+merged = Quantile_Sketch(0.01,seed=1).update(values[:500000]).merge(Quantile_Sketch(0.01,seed=2).update(values[500000:]))
+assert merged.count == observed.size and rank_error(merged) <= 0.01
+# Below k values the quantiles are exact
+assert np.allclose(Quantile_Sketch(0.01).update(values[:100]).quantile(quantiles),np.nanquantile(values[:100],quantiles))
+
+# Count-min estimates never undercount and overcount by more than epsilon*N for at most a
+# delta fraction of the keys
+keys = rng.zipf(1.3,1000000).astype(np.uint64)
+unique,true_counts = np.unique(keys,return_counts=True)
+sketch = Count_Min_Sketch(epsilon=1e-4,delta=0.01,seed=0).update(keys)
+overcount = sketch.query(unique) - true_counts
+assert (overcount >= 0).all() and (overcount > 1e-4*keys.size).mean() <= 0.01
+parts = Count_Min_Sketch(1e-4,0.01,0).update(keys[:400000]).merge(Count_Min_Sketch(1e-4,0.01,0).update(keys[400000:]))
+assert np.array_equal(parts.table,sketch.table) and parts.count == sketch.count
+
+# Frequency counts are exact up to max_exact distinct keys, also when merged, and fall back to
+# the sketch bound afterwards
+counter = Frequency_Counter(max_exact=unique.size).update(keys[:400000]).merge(Frequency_Counter(max_exact=unique.size).update(keys[400000:]))
+assert counter.exact and np.array_equal(counter.query(unique),true_counts)
+assert not counter.query(np.array([0],dtype=np.uint64)).any()
+small = Frequency_Counter(max_exact=1000,epsilon=1e-4).update(keys)
+assert not small.exact and (small.query(unique) >= true_counts).all()
+
+print("All sketch checks passed.")
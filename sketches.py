@@ -0,0 +1,259 @@
+class Quantile_Sketch:
+    '''
+        Mergeable KLL-style quantile sketch with bounded memory.
+
+        Values are kept in a stack of compactors. Items at level `h` stand for 2**h original
+        values, and whenever a level grows beyond its capacity it is sorted and every other
+        item is promoted to the next level. The sketch therefore holds roughly 3*k values no
+        matter how many were streamed through it, and two sketches built on different chunks
+        or processes can be merged level by level.
+
+        Parameters:
+            epsilon (float): Target normalised rank error of the quantiles. It fixes the
+                compactor size as k = 3.3 / epsilon (about 1% error for k = 330). The bound
+                holds with high probability, not deterministically.
+            seed (int, optional): Seed of the random offsets used while compacting.
+
+        Notes:
+        - Missing values are ignored.
+        - As long as no compaction has happened (fewer than k values seen) the quantiles are
+          exact and match pandas' linear interpolation.
+    '''
+
+    def __init__(self,epsilon=0.01,seed=None):
+        import numpy as np
+
+        self.epsilon = epsilon
+        self.k = max(8,int(np.ceil(3.3/epsilon)))
+        self.count = 0
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self,level):
+        # Lower levels get geometrically smaller capacities, the top level gets k
+        depth = len(self.compactors) - level - 1
+        return max(2,int(self.k*(2/3)**depth))
+
+    def _compress(self):
+        import numpy as np
+
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if items.size > self._capacity(level):
+                if level+1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays on this level, the rest is halved and promoted
+                leftover = items[:items.size % 2]
+                paired = items[items.size % 2:]
+                promoted = paired[self._rng.integers(2)::2]
+                self.compactors[level] = leftover
+                self.compactors[level+1] = np.concatenate([self.compactors[level+1],promoted])
+            level += 1
+
+    def update(self,values):
+        '''
+            Adds a batch of values (any array-like) to the sketch.
+        '''
+        import numpy as np
+
+        values = np.asarray(values,dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.count += values.size
+        self.compactors[0] = np.concatenate([self.compactors[0],values])
+        self._compress()
+        return self
+
+    def merge(self,other):
+        '''
+            Folds another sketch built with the same epsilon into this one.
+        '''
+        import numpy as np
+
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level,items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level],items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self,q):
+        '''
+            Estimates one quantile or an array of quantiles.
+
+            Returns:
+                float or np.ndarray: The estimated quantile(s), NaN when the sketch is empty.
+        '''
+        import numpy as np
+
+        if self.count == 0:
+            return np.full(np.shape(q),np.nan) if np.ndim(q) else np.nan
+        if len(self.compactors) == 1:
+            return np.quantile(self.compactors[0],q)
+
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(level_items.size,2.0**level) for level,level_items in enumerate(self.compactors)])
+        order = np.argsort(items,kind='stable')
+        items = items[order]
+        weights = weights[order]
+
+        # Every item sits at the middle of the rank range it represents
+        ranks = (np.cumsum(weights)-weights/2)/weights.sum()
+        return np.interp(q,ranks,items)
+
+    def __len__(self):
+        return sum(level_items.size for level_items in self.compactors)
+
+
+class Count_Min_Sketch:
+    '''
+        Mergeable count-min sketch of the frequencies of 64-bit keys.
+
+        Each of the `depth` rows maps a key to one of `width` counters with its own
+        multiply-shift hash; a count is added to every row and read back as the minimum over the
+        rows. Estimates never undercount, and overcount by at most epsilon*N with probability
+        1-delta, N being the total count.
+
+        Parameters:
+            epsilon (float): Relative overcount bound. It fixes the width as e/epsilon,
+                rounded up to a power of two.
+            delta (float): Probability of exceeding the bound. It fixes the depth as ln(1/delta).
+            seed (int): Seed of the row hashes. Only sketches with the same seed, epsilon and
+                delta can be merged.
+    '''
+
+    def __init__(self,epsilon=1e-5,delta=0.01,seed=0):
+        import numpy as np
+
+        self.epsilon = epsilon
+        self.delta = delta
+        self.seed = seed
+        self.bits = int(np.ceil(np.log2(np.e/epsilon)))
+        self.width = 1 << self.bits
+        self.depth = int(np.ceil(np.log(1/delta)))
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(0,2**63,self.depth,dtype=np.uint64)*np.uint64(2) + np.uint64(1)
+        self.table = np.zeros((self.depth,self.width),dtype=np.int64)
+        self.count = 0
+
+    def _slots(self,row,keys):
+        import numpy as np
+        return ((keys*self._multipliers[row]) >> np.uint64(64-self.bits)).astype(np.intp)
+
+    def update(self,keys,counts=None):
+        '''
+            Adds `counts` (one per key, 1 by default) to the uint64 `keys`.
+        '''
+        import numpy as np
+
+        keys = np.asarray(keys,dtype=np.uint64)
+        for row in range(self.depth):
+            added = np.bincount(self._slots(row,keys),weights=counts,minlength=self.width)
+            self.table[row] += added.astype(np.int64)
+        self.count += int(keys.size if counts is None else np.sum(counts))
+        return self
+
+    def merge(self,other):
+        '''
+            Adds another sketch built with the same parameters into this one.
+        '''
+        if (other.epsilon,other.delta,other.seed) != (self.epsilon,self.delta,self.seed):
+            raise ValueError("Only sketches with the same epsilon, delta and seed can be merged")
+        self.table += other.table
+        self.count += other.count
+        return self
+
+    def query(self,keys):
+        '''
+            Returns the estimated counts of the uint64 `keys`.
+        '''
+        import numpy as np
+
+        keys = np.asarray(keys,dtype=np.uint64)
+        estimate = self.table[0,self._slots(0,keys)]
+        for row in range(1,self.depth):
+            estimate = np.minimum(estimate,self.table[row,self._slots(row,keys)])
+        return estimate
+
+
+class Frequency_Counter:
+    '''
+        Counts of 64-bit keys that are exact while they fit and approximate afterwards.
+
+        Counts are kept in an exact table until it holds more than `max_exact` distinct keys;
+        from then on they are folded into a `Count_Min_Sketch` and memory stays fixed. Counters
+        built on different chunks, files or processes can be merged.
+
+        Parameters:
+            max_exact (int): Largest number of distinct keys counted exactly.
+            epsilon, delta, seed: Parameters of the count-min sketch, see `Count_Min_Sketch`.
+    '''
+
+    def __init__(self,max_exact=1000000,epsilon=1e-5,delta=0.01,seed=0):
+        import numpy as np
+
+        self.max_exact = max_exact
+        self.epsilon = epsilon
+        self.delta = delta
+        self.seed = seed
+        self.keys = np.empty(0,dtype=np.uint64)
+        self.counts = np.empty(0,dtype=np.int64)
+        self.sketch = None
+
+    @property
+    def exact(self):
+        return self.sketch is None
+
+    def _add(self,keys,counts):
+        import numpy as np
+
+        if self.sketch is not None:
+            self.sketch.update(keys,counts)
+            return
+        keys,inverse = np.unique(np.concatenate([self.keys,keys]),return_inverse=True)
+        self.counts = np.bincount(inverse,weights=np.concatenate([self.counts,counts]),minlength=keys.size).astype(np.int64)
+        self.keys = keys
+        if self.keys.size > self.max_exact:
+            self.sketch = Count_Min_Sketch(self.epsilon,self.delta,self.seed).update(self.keys,self.counts)
+            self.keys = np.empty(0,dtype=np.uint64)
+            self.counts = np.empty(0,dtype=np.int64)
+
+    def update(self,keys):
+        '''
+            Counts a batch of uint64 keys.
+        '''
+        import numpy as np
+
+        keys,counts = np.unique(np.asarray(keys,dtype=np.uint64),return_counts=True)
+        self._add(keys,counts)
+        return self
+
+    def merge(self,other):
+        '''
+            Folds another counter built with the same parameters into this one.
+        '''
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = Count_Min_Sketch(self.epsilon,self.delta,self.seed).update(self.keys,self.counts)
+                self.keys = self.keys[:0]
+                self.counts = self.counts[:0]
+            self.sketch.merge(other.sketch)
+        else:
+            self._add(other.keys,other.counts)
+        return self
+
+    def query(self,keys):
+        '''
+            Returns the (estimated) counts of the uint64 `keys`, 0 for keys never seen while exact.
+        '''
+        import numpy as np
+
+        keys = np.asarray(keys,dtype=np.uint64)
+        if self.sketch is not None:
+            return self.sketch.query(keys)
+        if self.keys.size == 0:
+            return np.zeros(keys.size,dtype=np.int64)
+        position = np.minimum(np.searchsorted(self.keys,keys),self.keys.size-1)
+        return np.where(self.keys[position] == keys,self.counts[position],0)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from treating_missing_values import Treating_Missing_Values,Streaming_Missing_Values
+
+# Row deletion matches dropna, also when index labels repeat
+data = pd.DataFrame({'A':[1.0,2.0,np.nan],'B':[1,2,3]},index=[0,0,1])
+cleaned = Treating_Missing_Values(data.copy(),'A').missing_value_deletion_byrow()
+assert cleaned.equals(data.dropna())
+
+# Mode imputation matches Series.mode()[0], for object columns and for categorical codes
+data = pd.DataFrame({'A':[1,2,2,None,4,4],'B':['x','y','y','x',None,'z'],'C':[None,None,'z','z','z',None]})
+expected = data.fillna(data.mode().iloc[0])
+assert Treating_Missing_Values(data.copy(),'A').missing_value_imputation_mode().equals(expected)
+treatment = Treating_Missing_Values(data.copy(),'A')
+treatment.missing_value_categorical_codes()
+assert treatment.missing_value_imputation_mode().astype(object).equals(expected.astype(object))
+
+# Batched imputation matches fillna with the pandas statistics; with copy_on_write the caller's
+# frame is kept and the untouched columns are shared
+housing = pd.read_csv('Raw_Housing_Prices.csv')
+original = housing.copy()
+strategy = {'Sale Price':'mean','Flat Area (in Sqft)':'median','No of Times Visited':'mode'}
+treatment = Treating_Missing_Values(housing,'Sale Price',copy_on_write=True)
+imputed = treatment.missing_value_imputation(strategy)
+expected = housing.fillna({'Sale Price':housing['Sale Price'].mean(),
+                           'Flat Area (in Sqft)':housing['Flat Area (in Sqft)'].median(),
+                           'No of Times Visited':housing['No of Times Visited'].mode()[0]})
+pd.testing.assert_frame_equal(imputed,expected)
+pd.testing.assert_frame_equal(housing,original)
+assert np.shares_memory(imputed['Zipcode'].to_numpy(),housing['Zipcode'].to_numpy())
+
+# Linear interpolation matches DataFrame.interpolate on the numeric columns
+numeric = housing.select_dtypes('number').columns
+interpolated = Treating_Missing_Values(housing.copy(),'Sale Price').missing_value_linear_interpolation()
+pd.testing.assert_frame_equal(interpolated[numeric],housing[numeric].interpolate(method='linear'))
+
+# Time interpolation within groups matches interpolate(method='time') on every group sorted by
+# date (dates are distinct here, ties take the earlier neighbour)
+rng = np.random.default_rng(0)
+dates = pd.Timestamp('2016-01-01') + pd.to_timedelta(rng.permutation(1000),unit='D')
+sales = pd.DataFrame({'Date House was Sold':dates.strftime('%d %B %Y'),'Zipcode':rng.integers(0,5,1000),
+                      'Sale Price':rng.normal(5e5,1e5,1000)})
+sales.loc[rng.random(1000) < 0.2,'Sale Price'] = np.nan
+interpolated = Treating_Missing_Values(sales.copy(),'Sale Price').missing_value_time_interpolation(group_by='Zipcode')
+expected = sales.set_index(dates).groupby('Zipcode')['Sale Price'].transform(
+    lambda group:group.sort_index().interpolate(method='time').reindex(group.index))
+assert np.allclose(interpolated['Sale Price'],expected.to_numpy(),equal_nan=True) and interpolated['Sale Price'].count() > sales['Sale Price'].count()
+
+# Streamed fill values match the in-memory statistics, also when a column is all missing in the
+# first chunk and text in later ones
+housing = housing.head(300)
+assert housing['No of Times Visited'].head(10).isnull().all()
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory,'housing.csv')
+    housing.to_csv(path,index=False)
+    means = Streaming_Missing_Values(path,chunksize=10).fit('mean')
+    numeric = housing.select_dtypes('number')
+    assert set(means) == set(numeric.columns)
+    assert all(np.isclose(means[column],numeric[column].mean()) for column in means)
+    modes = Streaming_Missing_Values(path,chunksize=10).fit('mode')
+    assert all(str(modes[column]) == str(housing[column].mode()[0]) for column in modes)
+    try:
+        Streaming_Missing_Values(path,chunksize=10).fit({'No of Times Visited':'mean'})
+        raise AssertionError('mean of a text column')
+    except ValueError:
+        pass
+
+print("All missing value checks passed.")
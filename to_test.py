@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from treating_outliers import Treating_outliers,Outlier_Bounds,Streaming_Treating_outliers
+
+# Fitted bounds applied to a new batch give the same result as treating it directly, and
+# neither touches the caller's frame
+data = pd.read_csv('Raw_Housing_Prices.csv')
+columns = ['Sale Price','Flat Area (in Sqft)']
+original = data.copy()
+bounds = Outlier_Bounds.from_json(Treating_outliers(data,'Sale Price').fit(columns).to_json())
+methods = {'capping':'outliers_capping','imputation_mean':'outliers_imputation_mean',
+           'imputation_median':'outliers_imputation_median','deletion':'outliers_deletion'}
+for method,treatment in methods.items():
+    treated = bounds.transform(data,method)
+    expected = getattr(Treating_outliers(data.copy(),'Sale Price'),treatment)(columns)
+    pd.testing.assert_frame_equal(treated,expected)
+    pd.testing.assert_frame_equal(data,original)
+
+# Copy-on-write steps leave the caller's frame as it was and share the untreated columns
+treatment = Treating_outliers(data,'Sale Price',copy_on_write=True)
+capped = treatment.outliers_capping(columns)
+pd.testing.assert_frame_equal(data,original)
+assert np.shares_memory(capped['Lot Area (in Sqft)'].to_numpy(),data['Lot Area (in Sqft)'].to_numpy())
+assert 0 < treatment.allocated_bytes <= capped[columns].memory_usage(index=False).sum()
+
+# Per-group fences give what treating every Zipcode on its own gives
+for treatment in methods.values():
+    grouped = getattr(Treating_outliers(data.copy(),'Sale Price',group_by='Zipcode'),treatment)()
+    expected = pd.concat([getattr(Treating_outliers(group.copy(),'Sale Price'),treatment)()
+                          for _,group in data.groupby('Zipcode',sort=False,dropna=False)])
+    pd.testing.assert_frame_equal(grouped.sort_index(),expected.sort_index())
+
+# Without context columns, binning imputes the masked outliers with the mean of the other values,
+# which is what RobustScaler + KNNImputer gave
+binned = Treating_outliers(data.copy(),'Sale Price').outliers_binning()
+mask,_,_ = Treating_outliers(data,'Sale Price')._outlier_mask(['Sale Price'])
+kept = data['Sale Price'].mask(mask['Sale Price'])
+assert np.allclose(binned['Sale Price'],kept.fillna(kept.mean()))
+
+# Chunked Mahalanobis scores equal MinCovDet's distances on the complete rows, for any chunk size
+from sklearn.covariance import MinCovDet
+numeric = ['Sale Price','Flat Area (in Sqft)','Lot Area (in Sqft)','Age of House (in Years)']
+listings = data.head(5000)
+score,flagged = Treating_outliers(listings,'Sale Price').outliers_multivariate(numeric,chunksize=1000)
+complete = listings[numeric].dropna()
+expected = np.sqrt(MinCovDet(random_state=0).fit(complete.to_numpy()).mahalanobis(complete.to_numpy()))
+assert np.allclose(score[complete.index],expected) and score.drop(complete.index).isna().all()
+assert score.equals(Treating_outliers(listings,'Sale Price').outliers_multivariate(numeric)[0])
+assert not flagged.drop(complete.index).any()
+
+# Streamed bounds come from quartiles within epsilon in rank and an exact mean
+streaming = Streaming_Treating_outliers('Raw_Housing_Prices.csv','Sale Price',chunksize=2000,epsilon=0.01)
+fitted = streaming.fit(columns).bounds
+for column in columns:
+    values = np.sort(data[column].dropna().to_numpy())
+    lower,upper = fitted[column]['lower'],fitted[column]['upper']
+    q1,q3 = (2.5*lower + 1.5*upper)/4,(1.5*lower + 2.5*upper)/4
+    for q,estimate in ((0.25,q1),(0.5,fitted[column]['median']),(0.75,q3)):
+        assert abs(np.searchsorted(values,estimate)/values.size - q) <= 0.01
+    assert np.isclose(fitted[column]['mean'],values.mean())
+
+print("All outlier checks passed.")
@@ -1,8 +1,54 @@
+from copy_on_write import copy_on_write_step
+
+
 class Treating_Missing_Values:
 
-    def __init__(self,data,target_variable):
+    def __init__(self,data,target_variable,copy_on_write=False):
         self.data = data
         self.target_variable = target_variable
+        self.copy_on_write = copy_on_write
+        self.allocated_bytes = None
+        self.allocation_log = []
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self,data):
+        # A new frame makes the cached missing-value profile and sort orders stale
+        self._data = data
+        self._profile = None
+        self._time_orders = {}
+
+    def _share_data(self,data):
+        # A copy-on-write step swaps in a shallow copy of the same frame, so the caches stay valid
+        self._data = data
+        if self._profile is not None:
+            self._profile.data_id = id(data)
+
+    def missing_value_profile(self):
+        '''
+            Return the cached `Missing_Value_Profile` of the data, building it on first use.
+
+            The profile is rebuilt when `self.data` is replaced or its shape changes. Methods of
+            this class that fill values update it in place, so a full cleaning run scans the frame
+            for nulls only once. Call `refresh_missing_value_profile` after changing the frame
+            in place from outside the class.
+
+            Returns
+            -------
+            Missing_Value_Profile
+        '''
+        if self._profile is None or not self._profile.matches(self.data):
+            self._profile = Missing_Value_Profile(self.data)
+        return self._profile
+
+    def refresh_missing_value_profile(self):
+        '''
+            Drop the cached profile so the next method call rescans the data.
+        '''
+        self._profile = None
 
     def display_missing_value(self):
         '''
@@ -40,9 +86,11 @@ class Treating_Missing_Values:
             >>> print(missing_values)
             [['A', 1], ['B', 1], ['C', 1]]
         '''
-        total_missing = ((self.data.isnull().sum().sum())/(self.data.shape[0]*self.data.shape[1]))*100
-        return [[column,null_values] for column,null_values in zip(self.data.columns,list(self.data.isnull().sum()))],total_missing
+        profile = self.missing_value_profile()
+        total_missing = (profile.total_missing/(self.data.shape[0]*self.data.shape[1]))*100
+        return [[column,profile.null_counts[column]] for column in profile.columns],total_missing
 
+    @copy_on_write_step
     def missing_value_deletion_byrow(self):
         '''
             Remove rows containing missing values from the dataset.
@@ -79,9 +127,17 @@ class Treating_Missing_Values:
         '''
         #Dropping every row that has even one missing value
         temp = self.data
-        temp.dropna(inplace=True,axis=0)
+        profile = self.missing_value_profile()
+        if profile.total_missing:
+            # Labels only identify the flagged rows when the index is unique
+            if temp.index.is_unique:
+                temp.drop(index=temp.index[profile.rows_with_missing()],inplace=True)
+            else:
+                temp.dropna(how='any',inplace=True)
+            self.refresh_missing_value_profile()
         return temp
     
+    @copy_on_write_step
     def missing_value_deletion_bycolumn(self,column_name = None):
         '''
             Remove columns with missing values from the dataset.
@@ -128,12 +184,84 @@ class Treating_Missing_Values:
         temp = self.data
         # Dropping every column that has even one missing value
         if column_name == None:
-            temp.dropna(inplace = True,axis = 1)
-            return temp
-        # if columns name as list is passed then it drops all those columns
-        temp.drop(columns = column_name,inplace = True)
+            column_name = self.missing_value_profile().columns_with_missing()
+        elif isinstance(column_name,str):
+            column_name = [column_name]
+        # if columns name as list is passed then it drops all those columns; `del` leaves the
+        # other column buffers untouched, where drop(inplace=True) copies every remaining block
+        for column in column_name:
+            del temp[column]
+        self.refresh_missing_value_profile()
         return temp
     
+    @copy_on_write_step
+    def missing_value_imputation(self,strategy='mean'):
+        '''
+            Impute missing values of many columns at once with per-column strategies.
+
+            Fill values are computed with one aggregation per strategy over the block of columns
+            that need it (modes of categorical columns are counted over their integer codes),
+            cached in the missing-value profile, and written back with a single dict-based `fillna`.
+
+            Parameters
+            ----------
+            strategy : str or dict, optional
+                Either one of 'mean', 'median' or 'mode' applied to every eligible column, or a
+                `{column_name: strategy}` dict choosing the strategy column by column.
+                'mean' and 'median' apply only to numeric (`int64`/`float64`) columns.
+                Default is 'mean'.
+
+            Returns
+            -------
+            pd.DataFrame
+                The modified DataFrame with missing values replaced.
+
+            Raises
+            ------
+            ValueError
+                If a strategy is not one of 'mean', 'median' or 'mode'.
+
+            Examples
+            --------
+            >>> import pandas as pd
+            >>> data = pd.DataFrame({
+            ...     'A': [1, 2, None, 4],
+            ...     'B': [10.5, None, 30.2, 40.1],
+            ...     'C': ['x', 'y', 'y', None]
+            ... })
+            >>> treatment = Treating_Missing_Values(data, target_variable='A')
+
+            # Mean for A, median for B and mode for C in one call
+            >>> cleaned_data = treatment.missing_value_imputation({'A': 'mean', 'B': 'median', 'C': 'mode'})
+        '''
+        temp = self.data
+        profile = self.missing_value_profile()
+
+        if isinstance(strategy,str):
+            dtype_class = None if strategy == 'mode' else 'numeric'
+            strategy = {column:strategy for column in profile.columns_with_missing(dtype_class)}
+
+        # Grouping the columns by strategy so every statistic is one aggregation
+        by_statistic = {}
+        for column,statistic in strategy.items():
+            if statistic not in ('mean','median','mode'):
+                raise ValueError(f"Unknown strategy {statistic!r} for column {column!r}")
+            if profile.null_counts[column]:
+                by_statistic.setdefault(statistic,[]).append(column)
+
+        fill_values = {}
+        for statistic,columns in by_statistic.items():
+            fill_values.update(profile.fill_values(temp,statistic,columns))
+
+        if fill_values:
+            # Whole columns are replaced, so a copy-on-write frame never writes into shared data
+            columns = list(fill_values)
+            temp[columns] = temp[columns].fillna(value=fill_values)
+        profile.mark_filled(list(fill_values))
+
+        return temp
+
+    @copy_on_write_step
     def missing_value_imputation_mean(self):
         '''
             Impute missing values using the mean of each numerical column.
@@ -166,15 +294,10 @@ class Treating_Missing_Values:
                 
                 
         '''
-        #creating copy of data
-        temp = self.data
         # Imputing missing values with mean for columns with data type int64 or float64
-        for ele in temp:
-            if temp[ele].dtype == 'int64' or temp[ele].dtype == 'float64':
-                temp[ele] = temp[ele].fillna(temp[ele].mean())
-                
-        return temp
+        return self.missing_value_imputation('mean')
     
+    @copy_on_write_step
     def missing_value_imputation_median(self):
         '''
             Impute missing values using the median of each numerical column.
@@ -206,15 +329,10 @@ class Treating_Missing_Values:
             # Perform median imputation on numeric columns
             >>> cleaned_data = treatment.missing_value_imputation_median()
         '''
-        #creating copy of data
-        temp = self.data
         # Imputing missing values with median for columns with data type int64 or float64
-        for ele in temp:
-            if temp[ele].dtype == 'int64' or temp[ele].dtype == 'float64':
-                temp[ele] = temp.fillna(temp[ele].median())
-                
-        return temp
+        return self.missing_value_imputation('median')
 
+    @copy_on_write_step
     def missing_value_imputation_mode(self):
         ''' 
             Impute missing values using the mode of each column.
@@ -247,16 +365,186 @@ class Treating_Missing_Values:
             >>> cleaned_data = treatment.missing_value_imputation_mode()
         
         '''
-        #creating copy of data
-        temp = self.data
         # Code aims to replace every missing value with mode values
-        for ele in temp.columns:
-            # Ensure mode exists before indexing
-            if not temp[ele].mode().empty:  
-                temp[ele] = temp[ele].fillna(temp[ele].mode()[0])
+        return self.missing_value_imputation('mode')
+
+    @copy_on_write_step
+    def missing_value_categorical_codes(self,column_name = None):
+        '''
+            Store text columns as pandas categoricals (integer codes plus one array of categories).
 
+            Mode imputation on a categorical column is a bincount over its codes, and filling a
+            missing value writes a code instead of a Python string object, which is much faster
+            and lighter than working on the raw object column.
+
+            Parameters
+            ----------
+            column_name : str, list of str, or None, optional
+                Columns to convert. If `None`, every non-numeric, non-datetime column is
+                converted. Default is `None`.
+
+            Returns
+            -------
+            pd.DataFrame
+                The modified DataFrame with the columns stored as `category` dtype.
+
+            Examples
+            --------
+            >>> import pandas as pd
+            >>> data = pd.DataFrame({
+            ...     'A': [1, 2, 2, None],
+            ...     'B': ['x', 'y', 'y', None]
+            ... })
+            >>> treatment = Treating_Missing_Values(data, target_variable='A')
+            >>> treatment.missing_value_categorical_codes()
+            >>> cleaned_data = treatment.missing_value_imputation_mode()
+        '''
+        temp = self.data
+        profile = self.missing_value_profile()
+        if column_name == None:
+            column_name = [column for column in profile.columns if profile.dtype_classes[column] == 'categorical']
+        elif isinstance(column_name,str):
+            column_name = [column_name]
+
+        for ele in column_name:
+            if temp[ele].dtype != 'category':
+                temp[ele] = temp[ele].astype('category')
+                profile.dtype_classes[ele] = 'categorical'
         return temp
 
+    @staticmethod
+    def _linear_fill(block,x=None,starts=None,ends=None):
+        '''
+            Linear interpolation of every column of a 2-D float array at once, in place.
+
+            The previous and next known row of every cell are found with cumulative max/min
+            scans, so gaps are located and filled without any Python loop. Leading missing
+            values stay NaN and trailing ones take the last known value, like
+            `Series.interpolate(method='linear')`.
+
+            Parameters
+            ----------
+            block : np.ndarray
+                2-D float array, rows in interpolation order.
+            x : np.ndarray, optional
+                Coordinate of every row. Defaults to the row position.
+            starts, ends : np.ndarray, optional
+                First and last row position of the group each row belongs to. Known values
+                are never borrowed across group boundaries.
+        '''
+        import numpy as np
+
+        n = block.shape[0]
+        missing = np.isnan(block)
+        rows = np.arange(n)[:,None]
+
+        prev = np.where(missing,-1,rows)
+        np.maximum.accumulate(prev,axis=0,out=prev)
+        nxt = np.where(missing,n,rows)
+        nxt = np.minimum.accumulate(nxt[::-1],axis=0)[::-1]
+        if starts is not None:
+            prev = np.where(prev >= starts[:,None],prev,-1)
+            nxt = np.where(nxt <= ends[:,None],nxt,n)
+
+        fill = missing & (prev >= 0)
+        r,c = np.nonzero(fill)
+        p = prev[fill]
+        q = nxt[fill]
+        values = block[p,c]
+
+        interior = q < n
+        if x is None:
+            x = np.arange(n,dtype=float)
+        x0 = x[p[interior]]
+        x1 = x[q[interior]]
+        y0 = values[interior]
+        y1 = block[q[interior],c[interior]]
+        span = x1 - x0
+        with np.errstate(divide='ignore',invalid='ignore'):
+            values[interior] = np.where(span > 0,y0 + (y1-y0)*(x[r[interior]]-x0)/span,y0)
+
+        block[r,c] = values
+        return block
+
+    @staticmethod
+    def _spline_fill(block,x,order,window,batch=8192):
+        '''
+            Spline interpolation of the interior gaps of a 2-D float array, in place.
+
+            Instead of one spline through the whole column, every gap is filled from a spline
+            of degree `order` through the `window` known points on each side of it. Gaps whose
+            windows overlap or lie close together share a single fit of at most about `batch`
+            known points, so the work grows linearly with the column length and isolated gaps
+            only cost their own window. Leading and trailing missing values stay NaN, like `Series.interpolate`
+            with the scipy methods.
+        '''
+        import numpy as np
+        from scipy.interpolate import make_interp_spline
+
+        missing = np.isnan(block)
+        for j in np.flatnonzero(missing.any(axis=0)):
+            column = block[:,j]
+            known = np.flatnonzero(~missing[:,j])
+            if known.size < 2:
+                continue
+            gaps = np.flatnonzero(missing[:,j])
+            gaps = gaps[(gaps > known[0]) & (gaps < known[-1])]
+            if gaps.size == 0:
+                continue
+
+            # Window of known points around every missing value, as positions in `known`
+            after = np.searchsorted(known,gaps)
+            lo = np.maximum(after-window,0)
+            hi = np.minimum(after+window,known.size)
+            reach = np.maximum.accumulate(hi)
+            segment_starts = np.flatnonzero(np.r_[True,lo[1:] >= reach[:-1]])
+            # Segments close to each other are batched into fits of up to about `batch` known
+            # points: fitting the few known points between them is cheaper than another fit
+            distance = lo[segment_starts[1:]] - reach[segment_starts[1:]-1]
+            block_id = lo[segment_starts]//batch
+            keep = np.r_[True,(distance > batch//16) | (block_id[1:] != block_id[:-1])]
+            segment_starts = segment_starts[keep]
+            segment_ends = np.r_[segment_starts[1:],gaps.size]
+
+            for start,end in zip(segment_starts,segment_ends):
+                points = known[lo[start]:reach[end-1]]
+                spline = make_interp_spline(x[points],column[points],k=min(order,points.size-1))
+                column[gaps[start:end]] = spline(x[gaps[start:end]])
+
+        return block
+
+    def _interpolate_block(self,method,order=None,window=16):
+        '''
+            Stacks the numeric columns with missing values into one 2-D array, interpolates it
+            with `_linear_fill` or `_spline_fill` and writes the columns back in one assignment.
+        '''
+        import numpy as np
+
+        temp = self.data
+        columns = self.missing_value_profile().columns_with_missing('numeric')
+        if columns:
+            block = temp[columns].to_numpy(dtype=float,copy=True)
+            if method == 'linear':
+                self._linear_fill(block)
+            else:
+                # Like pandas, the scipy-based methods interpolate against the index values
+                index = temp.index.to_numpy()
+                x = index.astype(float) if np.issubdtype(index.dtype,np.number) else np.arange(block.shape[0],dtype=float)
+                if np.all(np.diff(x) > 0):
+                    self._spline_fill(block,x,order,window)
+                else:
+                    # The splines need increasing x, so the rows are filled in index order and
+                    # scattered back; values before the first known row stay missing like pandas
+                    leading = np.cumsum(~np.isnan(block),axis=0) == 0
+                    sorter = np.argsort(x,kind='stable')
+                    block[sorter] = self._spline_fill(block[sorter],x[sorter],order,window)
+                    block[leading] = np.nan
+            temp[columns] = block
+        # Leading missing values may be left, so the profile is rebuilt on next use
+        self.refresh_missing_value_profile()
+        return temp
+
+    @copy_on_write_step
     def missing_value_linear_interpolation(self):
         '''
             Impute missing values using linear interpolation for numerical columns.
@@ -319,14 +607,10 @@ class Treating_Missing_Values:
             - Pandas Documentation: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.interpolate.html
 
         '''
-        #creating copy of data
-        temp = self.data
-        for ele in temp.columns:
-            if temp[ele].dtype == 'int64' or temp[ele].dtype == 'float64':
-                temp[ele] = temp[ele].interpolate(method="linear")
-        return temp
+        return self._interpolate_block('linear')
     
-    def missing_value_polynomial_interploation(self,order_val):
+    @copy_on_write_step
+    def missing_value_polynomial_interploation(self,order_val,window = 16):
         '''
             Impute missing values using **polynomial interpolation** of a given order for numerical columns.
 
@@ -342,6 +626,9 @@ class Treating_Missing_Values:
                 - `order_val=2`: **Quadratic interpolation** (parabolic curve).
                 - `order_val=3`: **Cubic interpolation** (third-degree polynomial).
                 - Higher values allow more complex interpolation but may cause overfitting.
+            window : int, optional
+                Number of known points taken on each side of a gap to fit its local spline.
+                Gaps whose windows overlap share one fit. Default is 16.
 
             Returns
             -------
@@ -387,14 +674,10 @@ class Treating_Missing_Values:
             ----------
             - Pandas Documentation: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.interpolate.html
         '''
-        #creating copy of data
-        temp = self.data
-        for ele in temp.columns:
-            if temp[ele].dtype == 'int64' or temp[ele].dtype == 'float64':
-                temp[ele] = temp[ele].interpolate(method="polynomial",order = order_val)
-        return temp
+        return self._interpolate_block('polynomial',order = order_val,window = window)
 
-    def missing_value_cubic_interpolation(self):
+    @copy_on_write_step
+    def missing_value_cubic_interpolation(self,window = 16):
         '''
             Impute missing values using **cubic interpolation** for numerical columns.
 
@@ -410,7 +693,9 @@ class Treating_Missing_Values:
 
             Parameters
             ----------
-            None
+            window : int, optional
+                Number of known points taken on each side of a gap to fit its local spline.
+                Gaps whose windows overlap share one fit. Default is 16.
 
             Notes
             -----
@@ -451,13 +736,110 @@ class Treating_Missing_Values:
             ----------
             - Pandas Documentation: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.interpolate.html
         '''
-        #creating copy of data
+        return self._interpolate_block('cubic',order = 3,window = window)
+    
+    def _time_order(self,date_column,group_by):
+        '''
+            Parse `date_column` and sort the rows by (group, time) once, caching the result.
+
+            Returns
+            -------
+            tuple
+                `(order, x, starts, ends)`: row positions in sorted order (rows with an unparseable
+                date are left out), their times in days, and for every sorted row the first and
+                last sorted position of its group.
+        '''
+        import pandas as pd
+        import numpy as np
+
+        key = (date_column,group_by)
+        cached = self._time_orders.get(key)
+        if cached is not None and cached[0] == self.data.shape:
+            return cached[1]
+
+        dates = self.data[date_column]
+        if dates.dtype.kind != 'M':
+            dates = pd.to_datetime(dates,errors='coerce')
+        dates = dates.to_numpy()
+        valid = ~np.isnat(dates)
+        times = dates.astype('datetime64[ns]').astype('int64')/86400e9
+
+        if group_by is None:
+            codes = np.zeros(len(dates),dtype=np.int64)
+        else:
+            codes,_ = pd.factorize(self.data[group_by],use_na_sentinel=False)
+
+        order = np.flatnonzero(valid)
+        order = order[np.lexsort((times[order],codes[order]))]
+        x = times[order]
+        sorted_codes = codes[order]
+
+        # First and last sorted position of the group every sorted row belongs to
+        boundaries = np.flatnonzero(np.r_[True,sorted_codes[1:] != sorted_codes[:-1]])
+        run = np.cumsum(np.r_[True,sorted_codes[1:] != sorted_codes[:-1]]) - 1
+        starts = boundaries[run]
+        ends = np.r_[boundaries[1:],len(order)][run] - 1
+
+        result = (order,x,starts,ends)
+        self._time_orders[key] = (self.data.shape,result)
+        return result
+
+    @copy_on_write_step
+    def missing_value_time_interpolation(self,date_column = 'Date House was Sold',group_by = None,column_name = None):
+        '''
+            Impute missing values by linear interpolation against real time, optionally within groups.
+
+            The date column is parsed and the rows are sorted by (group, date) once. The sort
+            order is cached on the instance, so interpolating more columns or calling the method
+            again does not re-parse or re-sort. Every numeric column is interpolated in that order
+            against the elapsed time between sales, never borrowing values from another group,
+            and the results are scattered back to the original row order.
+
+            Parameters
+            ----------
+            date_column : str, optional
+                Column holding the sale dates. Default is 'Date House was Sold'.
+            group_by : str, optional
+                Column whose groups are interpolated separately, e.g. 'Zipcode'. Default is `None`.
+            column_name : str, list of str, or None, optional
+                Columns to interpolate. If `None`, every numeric column with missing values.
+
+            Returns
+            -------
+            pd.DataFrame
+                The modified DataFrame with missing values interpolated over time.
+
+            Notes
+            -----
+            - Like `missing_value_linear_interpolation`, missing values before the first known
+            value of a group stay missing and those after the last known value take that value.
+            - Rows sold on the same date as their neighbour take the neighbour's value.
+            - Rows whose date cannot be parsed are left unchanged and are not used as neighbours.
+
+            Examples
+            --------
+            >>> import pandas as pd
+            >>> data = pd.read_csv('Raw_Housing_Prices.csv')
+            >>> treatment = Treating_Missing_Values(data, target_variable='Sale Price')
+            >>> cleaned_data = treatment.missing_value_time_interpolation(group_by='Zipcode')
+        '''
         temp = self.data
-        for ele in temp.columns:
-            if temp[ele].dtype == 'int64' or temp[ele].dtype == 'float64':
-                temp[ele] = temp[ele].interpolate(method="cubic")
+        if column_name == None:
+            column_name = self.missing_value_profile().columns_with_missing('numeric')
+        elif isinstance(column_name,str):
+            column_name = [column_name]
+
+        if column_name:
+            order,x,starts,ends = self._time_order(date_column,group_by)
+            values = temp[column_name].to_numpy(dtype=float,copy=True)
+            values[order] = self._linear_fill(values[order],x=x,starts=starts,ends=ends)
+            temp[column_name] = values
+
+        # Leading missing values may be left, so the profile is rebuilt on next use
+        self.refresh_missing_value_profile()
         return temp
-    
+
+    @copy_on_write_step
     def missing_value_forward_fill(self):
         '''
                def missing_value_forward_fill(
@@ -474,11 +856,284 @@ class Treating_Missing_Values:
         temp = self.data
         return temp.ffill()
     
+    @copy_on_write_step
     def missing_value_backward_fill(self):
         temp = self.data
         return temp.bfill()
 
 
+class Missing_Value_Profile:
+    '''
+        One-pass summary of the missing values of a DataFrame.
+
+        The frame is scanned for nulls exactly once. The profile keeps the per-column null
+        counts, the null positions packed into bitmasks (one bit per row and column), and the
+        dtype class of every column. Fill statistics (mean, median, mode) are computed the first
+        time they are asked for and then cached, so every imputation reuses them.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The frame to profile.
+
+        Notes
+        -----
+        - Columns of dtype `int64` or `float64` are classed as 'numeric', `datetime64` columns as
+        'datetime' and every other column as 'categorical'.
+        - `Treating_Missing_Values` keeps one profile per frame and updates or drops it whenever
+        one of its own methods changes the data.
+    '''
+
+    def __init__(self,data):
+        import numpy as np
+
+        null_mask = data.isnull().to_numpy()
+
+        self.data_id = id(data)
+        self.shape = data.shape
+        self.columns = list(data.columns)
+        self.null_counts = dict(zip(self.columns,null_mask.sum(axis=0).tolist()))
+        self.null_bitmasks = np.packbits(null_mask,axis=0)
+        self.dtype_classes = {}
+        for column,dtype in data.dtypes.items():
+            if dtype == 'int64' or dtype == 'float64':
+                self.dtype_classes[column] = 'numeric'
+            elif dtype.kind == 'M':
+                self.dtype_classes[column] = 'datetime'
+            else:
+                self.dtype_classes[column] = 'categorical'
+        self.statistics = {'mean':{},'median':{},'mode':{}}
+
+    def matches(self,data):
+        '''
+            Cheap check that the profile was built from this frame and its shape is unchanged.
+        '''
+        return self.data_id == id(data) and self.shape == data.shape and self.columns == list(data.columns)
+
+    @property
+    def total_missing(self):
+        return sum(self.null_counts.values())
+
+    def columns_with_missing(self,dtype_class=None):
+        '''
+            Columns holding at least one missing value, optionally restricted to one dtype class.
+        '''
+        return [column for column in self.columns
+                if self.null_counts[column] and (dtype_class is None or self.dtype_classes[column] == dtype_class)]
+
+    def null_positions(self,column):
+        '''
+            Row positions of the missing values of `column`, unpacked from its bitmask.
+        '''
+        import numpy as np
+
+        bits = np.unpackbits(self.null_bitmasks[:,self.columns.index(column)],count=self.shape[0])
+        return np.flatnonzero(bits)
+
+    def rows_with_missing(self):
+        '''
+            Boolean array flagging every row with at least one missing value.
+        '''
+        import numpy as np
+
+        return np.unpackbits(self.null_bitmasks,axis=0,count=self.shape[0]).any(axis=1)
+
+    def fill_values(self,data,statistic,columns):
+        '''
+            Returns the cached `statistic` ('mean', 'median' or 'mode') of `columns`, computing
+            only the missing ones in a single aggregation.
+
+            Returns
+            -------
+            dict
+                `{column: value}`. Columns whose statistic is missing (all values missing) are left out.
+        '''
+        import pandas as pd
+
+        cache = self.statistics[statistic]
+        pending = [column for column in columns if column not in cache]
+        if pending:
+            if statistic == 'mode':
+                for column in pending:
+                    cache[column] = self._mode(data[column])
+            else:
+                cache.update(data[pending].agg(statistic).to_dict())
+        return {column:cache[column] for column in columns if not pd.isna(cache[column])}
+
+    @staticmethod
+    def _mode(series):
+        '''
+            Most frequent value of `series`. Categorical columns bincount their stored integer
+            codes; other columns use `Series.mode`, since factorizing them first hashes every
+            value just the same and is slower. Ties go to the smallest value (first category),
+            like `Series.mode()[0]`.
+        '''
+        import pandas as pd
+        import numpy as np
+
+        if isinstance(series.dtype,pd.CategoricalDtype):
+            # -1 marks a missing value; shifting by one keeps the codes in their own small dtype
+            # (it always has room for one more category) and drops them in bin 0. bincount
+            # widens its input to intp, so blocks keep that temporary in cache
+            codes = series.cat.codes.to_numpy()
+            counts = np.zeros(len(series.cat.categories)+1,dtype=np.int64)
+            for start in range(0,len(codes),1<<18):
+                counts += np.bincount(codes[start:start+(1<<18)]+1,minlength=len(counts))
+            counts = counts[1:]
+            if not counts.any():
+                return None
+            return series.cat.categories[counts.argmax()]
+
+        mode = series.mode()
+        return mode.iloc[0] if not mode.empty else None
+
+    def mark_filled(self,columns):
+        '''
+            Records that every missing value of `columns` has been filled, without rescanning.
+            Cached statistics of those columns are dropped since their values changed.
+        '''
+        for column in columns:
+            position = self.columns.index(column)
+            self.null_counts[column] = 0
+            self.null_bitmasks[:,position] = 0
+            for cache in self.statistics.values():
+                cache.pop(column,None)
+
+
+class Streaming_Missing_Values:
+    '''
+        Two-pass missing value imputation for CSV files larger than memory.
+
+        The first pass (`fit`) reads the file in chunks and accumulates exact sums and counts
+        for means, a `Quantile_Sketch` per column for approximate medians, and value counts for
+        modes. The second pass (`transform`) fills each chunk with the fitted values and appends
+        it to the output file, so peak memory depends on `chunksize` and not on the file size.
+
+        Parameters
+        ----------
+        path : str
+            Path of the input CSV file.
+        chunksize : int, optional
+            Number of rows read per chunk. Default is 100000.
+        epsilon : float, optional
+            Rank error bound of the median sketches. Default is 0.01.
+        dtype : type or dict, optional
+            Passed to `pd.read_csv` in both passes. Without it every chunk infers its own
+            dtypes, so a column that is all missing in one chunk and text in another only
+            turns out to be non-numeric part way through the file. Default is None.
+
+        Examples
+        --------
+        >>> streaming = Streaming_Missing_Values('Raw_Housing_Prices.csv', chunksize=5000)
+        >>> fill_values = streaming.fit({'Sale Price': 'median', 'No of Times Visited': 'mode'})
+        >>> rows = streaming.transform('Clean_Housing_Prices.csv')
+    '''
+
+    def __init__(self,path,chunksize=100000,epsilon=0.01,dtype=None):
+        self.path = path
+        self.chunksize = chunksize
+        self.epsilon = epsilon
+        self.dtype = dtype
+        self.fill_values = None
+
+    def fit(self,strategy='mean'):
+        '''
+            First pass: accumulate the statistics and derive one fill value per column.
+
+            Parameters
+            ----------
+            strategy : str or dict, optional
+                One of 'mean', 'median' or 'mode' for every eligible column ('mean' and
+                'median' only apply to columns that are numeric in every chunk), or a
+                `{column_name: strategy}` dict. Default is 'mean'.
+
+            Returns
+            -------
+            dict
+                `{column_name: fill_value}`, also kept in `self.fill_values`.
+        '''
+        import pandas as pd
+        from sketches import Quantile_Sketch
+
+        sums,counts,sketches,mode_counts = {},{},{},{}
+        every_column = isinstance(strategy,str)
+
+        for i,chunk in enumerate(pd.read_csv(self.path,chunksize=self.chunksize,dtype=self.dtype)):
+            if i == 0:
+                if every_column:
+                    strategy = {column:strategy for column in chunk.columns}
+                for column,statistic in strategy.items():
+                    if statistic not in ('mean','median','mode'):
+                        raise ValueError(f"Unknown strategy {statistic!r} for column {column!r}")
+                    if statistic == 'median':
+                        sketches[column] = Quantile_Sketch(self.epsilon)
+
+            for column,statistic in list(strategy.items()):
+                if statistic != 'mode' and chunk[column].dtype.kind not in 'iuf':
+                    # Dtypes are inferred per chunk, so this can first happen in a later chunk
+                    if not every_column:
+                        raise ValueError(f"Column {column!r} is not numeric from row {i*self.chunksize} on, "
+                                         f"so it has no {statistic}")
+                    del strategy[column]
+                    sums.pop(column,None)
+                    counts.pop(column,None)
+                    sketches.pop(column,None)
+                elif statistic == 'mean':
+                    sums[column] = sums.get(column,0.0) + chunk[column].sum()
+                    counts[column] = counts.get(column,0) + chunk[column].count()
+                elif statistic == 'median':
+                    sketches[column].update(chunk[column].to_numpy())
+                else:
+                    value_counts = chunk[column].value_counts()
+                    mode_counts[column] = value_counts if column not in mode_counts else mode_counts[column].add(value_counts,fill_value=0)
+
+        self.fill_values = {}
+        for column,statistic in strategy.items():
+            if statistic == 'mean' and counts[column]:
+                self.fill_values[column] = float(sums[column]/counts[column])
+            elif statistic == 'median' and sketches[column].count:
+                self.fill_values[column] = float(sketches[column].quantile(0.5))
+            elif statistic == 'mode' and len(mode_counts.get(column,())):
+                # Ties go to the smallest value, like Series.mode()[0]; chunks that inferred
+                # different dtypes can mix numbers and strings, which only compare as text
+                tied = mode_counts[column].index[mode_counts[column].to_numpy() == mode_counts[column].max()]
+                try:
+                    self.fill_values[column] = min(tied)
+                except TypeError:
+                    self.fill_values[column] = min(tied,key=str)
+
+        return self.fill_values
+
+    def transform(self,output_path,strategy='mean'):
+        '''
+            Second pass: fill every chunk and append it to `output_path`.
+
+            Parameters
+            ----------
+            output_path : str
+                CSV file the cleaned rows are written to.
+            strategy : str or dict, optional
+                Used to fit the fill values when `fit` has not been called yet.
+
+            Returns
+            -------
+            int
+                Number of rows written.
+        '''
+        import pandas as pd
+
+        if self.fill_values is None:
+            self.fit(strategy)
+
+        rows = 0
+        for i,chunk in enumerate(pd.read_csv(self.path,chunksize=self.chunksize,dtype=self.dtype)):
+            chunk = chunk.fillna(value=self.fill_values)
+            chunk.to_csv(output_path,mode='w' if i == 0 else 'a',header=(i == 0),index=False)
+            rows += chunk.shape[0]
+
+        return rows
+
+
 
 
 import pandas as pd
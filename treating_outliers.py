@@ -1,10 +1,111 @@
+from copy_on_write import copy_on_write_step
+
+
 class Treating_outliers:
 
-    def __init__(self,data,target_variable):
+    def __init__(self,data,target_variable,group_by=None,copy_on_write=False):
         self.data = data
         self.target_variable = target_variable
+        # Optional column (e.g. 'Zipcode') whose groups each get their own IQR fences
+        self.group_by = group_by
+        self.copy_on_write = copy_on_write
+        self.allocated_bytes = None
+        self.allocation_log = []
+
+    def _columns(self,columns):
+        '''
+            Normalises the `columns` argument of the treatment methods into a list of column names.
+            Defaults to the target variable when no columns are given.
+        '''
+        if columns is None:
+            return [self.target_variable]
+        if isinstance(columns,str):
+            return [columns]
+        return list(columns)
+
+    def _group_codes(self):
+        '''
+            Factorizes the `group_by` column into integer group codes (-1 for a missing key).
+
+            Returns:
+                tuple: (codes, number_of_groups)
+        '''
+        import pandas as pd
+
+        codes,uniques = pd.factorize(self.data[self.group_by])
+        return codes,len(uniques)
+
+    def _broadcast(self,group_stats,codes,n_groups):
+        '''
+            Spreads per-group statistics (one row per group code) back onto the rows of
+            `self.data` with a single take. Rows with a missing group key get NaN.
+        '''
+        import pandas as pd
+        import numpy as np
+
+        values = group_stats.reindex(range(n_groups)).to_numpy(dtype=float)
+        values = np.vstack([values,np.full((1,values.shape[1]),np.nan)])
+        return pd.DataFrame(values[codes],index=self.data.index,columns=group_stats.columns)
 
-    def outliers_deletion(self):
+    def _replacement(self,columns,statistic):
+        '''
+            Mean or median of `columns`, per group when `group_by` is set.
+
+            Returns:
+                pd.Series indexed by column name, or a pd.DataFrame aligned with `self.data`
+                when grouped.
+        '''
+        if self.group_by is None:
+            return self.data[columns].agg(statistic)
+        codes,n_groups = self._group_codes()
+        return self._broadcast(self.data[columns].groupby(codes).agg(statistic),codes,n_groups)
+
+    def _outlier_bounds(self,columns,grouped=True):
+        '''
+            Calculates the IQR lower and upper extremes of every column in `columns` with a single
+            quantile pass over the column block.
+
+            When `group_by` is set the quartiles come from one grouped quantile aggregation and
+            are broadcast back to the rows, so every row is compared with its own group's fences.
+
+            Returns:
+                tuple: (lower_extreme, upper_extreme) as pd.Series indexed by column name, or as
+                pd.DataFrame aligned with `self.data` when grouped.
+        '''
+        if self.group_by is None or not grouped:
+            # Calculating lower and upper quantiles of all the columns at once
+            quantiles = self.data[columns].quantile([0.25,0.75])
+            q1 = quantiles.loc[0.25]
+            q3 = quantiles.loc[0.75]
+        else:
+            # Calculating lower and upper quantiles of all the groups at once
+            codes,n_groups = self._group_codes()
+            quantiles = self.data[columns].groupby(codes).quantile([0.25,0.75])
+            q1 = self._broadcast(quantiles.xs(0.25,level=-1),codes,n_groups)
+            q3 = self._broadcast(quantiles.xs(0.75,level=-1),codes,n_groups)
+
+        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
+        iqr = q3-q1
+
+        lower_extreme = q1 - (1.5*iqr)
+        upper_extreme = q3 + (1.5*iqr)
+        return lower_extreme,upper_extreme
+
+    def _outlier_mask(self,columns):
+        '''
+            Flags every value lying outside the IQR extremes of its column.
+
+            Returns:
+                tuple: (mask, lower_extreme, upper_extreme) where mask is a boolean pd.DataFrame
+                shaped like `self.data[columns]`. Missing values are never flagged.
+        '''
+        lower_extreme,upper_extreme = self._outlier_bounds(columns)
+        block = self.data[columns]
+        mask = block.lt(lower_extreme,axis=1) | block.gt(upper_extreme,axis=1)
+        return mask,lower_extreme,upper_extreme
+
+    @copy_on_write_step
+    def outliers_deletion(self,columns=None):
         '''
             Removes outliers from the dataset using the Interquartile Range (IQR) method.
         
@@ -18,36 +119,26 @@ class Treating_outliers:
             Any data points outside these bounds are considered outliers and removed
             from the dataset.
 
+            Parameters:
+                columns (str or list, optional): Columns to treat in one pass. A row is removed
+                    if it is an outlier in any of them. Defaults to the target variable.
+
             Returns:
                 pd.DataFrame: A DataFrame with outliers removed.
 
         '''
-        # Calculating lower and upper quantiles 
-        q1 = self.data[self.target_variable].quantile(0.25)
-        q3 = self.data[self.target_variable].quantile(0.75)
-
-        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
-        iqr = q3-q1
+        columns = self._columns(columns)
+        mask,_,_ = self._outlier_mask(columns)
 
-        #Lower Extreme
-        lower_extreme = q1 - (1.5*iqr)
-        upper_extreme = q3 + (1.5*iqr)
-        # Getting Number of rows and creating a list to store dorpping index
-        dim = self.data.shape[0]
-        drop_indexs = []
-
-        #getting all the indexes where Outliers exists
-        for i in range(dim):
-            val = self.data[self.target_variable][i]
-            if val> upper_extreme or val<lower_extreme:
-                drop_indexs.append(i)
-
-        #dropping the rows with outliers
-        self.data = self.data.drop(self.data.index[drop_indexs])
+        #dropping the rows with outliers in any of the columns
+        outliers = mask.any(axis=1).to_numpy()
+        if outliers.any():
+            self.data = self.data[~outliers]
 
         return self.data
     
-    def outliers_imputation_mean(self):
+    @copy_on_write_step
+    def outliers_imputation_mean(self,columns=None):
         '''
             Removes outliers from the dataset using the Interquartile Range (IQR) method.
         
@@ -61,35 +152,25 @@ class Treating_outliers:
             Any data points outside these bounds are considered outliers and are replaced with
             the mean of the target variable.
 
+            Parameters:
+                columns (str or list, optional): Columns to treat in one pass, each one replaced
+                    with its own mean. Defaults to the target variable.
+
             Returns:
                 pd.DataFrame: A DataFrame with outliers removed.
 
         '''
-        # Calculating lower and upper quantiles 
-        q1 = self.data[self.target_variable].quantile(0.25)
-        q3 = self.data[self.target_variable].quantile(0.75)
-
-        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
-        iqr = q3-q1
-
-        #Lower Extreme
-        lower_extreme = q1 - (1.5*iqr)
-        upper_extreme = q3 + (1.5*iqr)
-
-        #Getting Dimension of data
-        dim = self.data.shape[0]
-        avg = self.data[self.target_variable].mean()
-
+        columns = self._columns(columns)
+        mask,_,_ = self._outlier_mask(columns)
+        avg = self._replacement(columns,'mean')
 
         # Replacing outliers with mean
-        for i in range(dim):
-            val = self.data[self.target_variable][i]
-            if val>upper_extreme or val<lower_extreme:
-                self.data.loc[i,self.target_variable] = avg
+        self.data[columns] = self.data[columns].mask(mask,avg,axis=1)
 
         return self.data 
     
-    def outliers_imputation_median(self):
+    @copy_on_write_step
+    def outliers_imputation_median(self,columns=None):
         '''
             Removes outliers from the dataset using the Interquartile Range (IQR) method.
         
@@ -103,36 +184,25 @@ class Treating_outliers:
             Any data points outside these bounds are considered outliers and are replaced with
             the median of the target variable.
 
+            Parameters:
+                columns (str or list, optional): Columns to treat in one pass, each one replaced
+                    with its own median. Defaults to the target variable.
+
             Returns:
                 pd.DataFrame: A DataFrame with outliers removed.
 
         '''
-        # Calculating lower and upper quantiles 
-        q1 = self.data[self.target_variable].quantile(0.25)
-        q3 = self.data[self.target_variable].quantile(0.75)
-
-        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
-        iqr = q3-q1
-
-        #Lower Extreme
-        lower_extreme = q1 - (1.5*iqr)
-        upper_extreme = q3 + (1.5*iqr)
-
-        
-        #Getting Dimension of data
-        dim = self.data.shape[0]
-        avg = self.data[self.target_variable].median()
-
+        columns = self._columns(columns)
+        mask,_,_ = self._outlier_mask(columns)
+        avg = self._replacement(columns,'median')
 
         # Replacing outliers with median
-        for i in range(dim):
-            val = self.data[self.target_variable][i]
-            if val>upper_extreme or val<lower_extreme:
-                self.data.loc[i,self.target_variable] = avg
+        self.data[columns] = self.data[columns].mask(mask,avg,axis=1)
 
         return self.data 
     
-    def outliers_capping(self):
+    @copy_on_write_step
+    def outliers_capping(self,columns=None):
 
         '''
             Caps outliers in the target variable using the Interquartile Range (IQR) method.
@@ -146,40 +216,27 @@ class Treating_outliers:
             Any values lower than the lower bound are replaced with the lower bound, 
             and any values higher than the upper bound are replaced with the upper bound.
 
+            Parameters:
+                columns (str or list, optional): Columns to cap in one pass, each one against
+                    its own bounds. Defaults to the target variable.
+
             Returns:
                 pd.DataFrame: A DataFrame with outliers capped within the lower and upper extreme values.
         
         '''
-
-        # Calculating lower and upper quantiles
-        q1 = self.data[self.target_variable].quantile(0.25)
-        q3 = self.data[self.target_variable].quantile(0.75)
-
-        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
-        iqr = q3-q1
-
-        #Lower Extreme
-        lower_extreme = q1 - (1.5*iqr)
-        upper_extreme = q3 + (1.5*iqr)
-
-        #getting the dimension
-        dim = self.data.shape[0]
+        columns = self._columns(columns)
+        lower_extreme,upper_extreme = self._outlier_bounds(columns)
+        block = self.data[columns]
 
         #Replacing value lower than lower_extreme with lower_extreme
         #Replacing value higer that upper_extreme with upper_extrme
+        block = block.mask(block.lt(lower_extreme,axis=1),lower_extreme,axis=1)
+        block = block.mask(block.gt(upper_extreme,axis=1),upper_extreme,axis=1)
+        self.data[columns] = block
 
-        for i in range(dim):
-            val = self.data[self.target_variable][i]
-
-            if val<lower_extreme:
-                self.data.loc[i,self.target_variable] = lower_extreme
-
-            if val>upper_extreme:
-                self.data.loc[i,self.target_variable] = upper_extreme
-
-        
         return self.data
     
+    @copy_on_write_step
     def outliers_log10_transformation(self):
         '''
             Applies a base-10 logarithmic transformation to the target variable in the dataset.
@@ -196,9 +253,60 @@ class Treating_outliers:
         self.data[self.target_variable] = np.log10(self.data[self.target_variable])
         return self.data
     
-    def outliers_binning(self):
+    def _neighbour_imputation(self,column,context_columns=None,n_neighbors=5):
         '''
-            Performs outlier detection, scaling, and imputation on the target variable to enhance data quality.
+            Fills the missing values of `column` from their nearest neighbours without building a
+            pairwise distance matrix.
+
+            Without context columns a missing row has no coordinate to measure distances on, so
+            every donor is equally near and `KNNImputer` falls back to the mean of the observed
+            values. That mean is used directly here, which is O(n).
+
+            With context columns the observed rows are indexed in a KD-tree over the
+            `RobustScaler`-scaled context, and each missing row takes the mean of its
+            `n_neighbors` nearest donors, which is O(n log n). Rows with a missing context value
+            are not used as donors and, when missing themselves, fall back to the column mean.
+            When `group_by` is set, the mean fallback is the mean of the row's own group.
+
+            Returns:
+                pd.Series: The column with its missing values imputed.
+        '''
+        import pandas as pd
+        import numpy as np
+        from scipy.spatial import cKDTree
+        from sklearn.preprocessing import RobustScaler
+
+        values = self.data[column].to_numpy(dtype=float,copy=True)
+        missing = np.isnan(values)
+        fill_value = values[~missing].mean() if (~missing).any() else np.nan
+
+        if self.group_by is not None:
+            codes,_ = self._group_codes()
+            group_mean = pd.Series(values).groupby(codes).transform('mean').to_numpy()
+            fill_value = np.where(np.isnan(group_mean),fill_value,group_mean)
+        else:
+            fill_value = np.full(values.shape,fill_value)
+
+        if context_columns:
+            context = RobustScaler().fit_transform(self.data[list(context_columns)].to_numpy(dtype=float))
+            complete = ~np.isnan(context).any(axis=1)
+            donors = ~missing & complete
+            receivers = missing & complete
+            if receivers.any() and donors.any():
+                k = min(n_neighbors,int(donors.sum()))
+                tree = cKDTree(context[donors])
+                _,neighbours = tree.query(context[receivers],k=k)
+                neighbours = neighbours.reshape(-1,k)
+                values[receivers] = values[donors][neighbours].mean(axis=1)
+                missing = missing & ~receivers
+
+        values[missing] = fill_value[missing]
+        return pd.Series(values,index=self.data.index,name=column)
+
+    @copy_on_write_step
+    def outliers_binning(self,columns=None,context_columns=None,n_neighbors=5):
+        '''
+            Performs outlier detection and nearest-neighbour imputation on the target variable to enhance data quality.
 
             This method applies robust statistical techniques to handle outliers and missing values, ensuring 
             the dataset is well-prepared for downstream analysis or modeling.
@@ -209,14 +317,19 @@ class Treating_outliers:
             - Defines lower and upper bounds using the 1.5 * IQR rule.
             - Replaces detected outliers with NaN values.
 
-            2. **Data Scaling**:
-            - Applies `RobustScaler` to mitigate the influence of outliers while preserving the data distribution.
+            2. **Missing Value Imputation**:
+            - Without `context_columns`, gives the same values as scaling the column with `RobustScaler`
+              and running `KNNImputer(n_neighbors=5)` on it: the mean of the remaining values.
+            - With `context_columns`, uses a KD-tree over the robust-scaled context columns and replaces
+              every missing value with the mean of its `n_neighbors` nearest rows.
 
-            3. **Missing Value Imputation**:
-            - Uses `KNNImputer` with k=5 to estimate and replace missing values based on nearest neighbors.
-
-            4. **Inverse Transformation**:
-            - Restores the scaled values back to their original range using inverse transformation.
+            Parameters:
+                columns (str or list, optional): Columns to treat. Outliers of all of them are
+                    masked in one pass and every column is then imputed on its own.
+                    Defaults to the target variable.
+                context_columns (list, optional): Numeric columns used to find neighbours,
+                    e.g. ['Flat Area (in Sqft)', 'Zipcode'].
+                n_neighbors (int): Number of neighbours averaged per missing value.
 
             Returns:
                 pd.DataFrame: The processed dataset with outliers addressed and missing values imputed.
@@ -229,52 +342,298 @@ class Treating_outliers:
                 
         '''
 
+        import numpy as np
+
+        columns = self._columns(columns)
+        mask,_,_ = self._outlier_mask(columns)
+
+        #The data should contain no missing value priorly
+        #Changing every outlier value to null Value
+        self.data[columns] = self.data[columns].mask(mask,np.nan)
+
+        for column in columns:
+            self.data[column] = self._neighbour_imputation(column,context_columns,n_neighbors)
+
+        return self.data
+
+    def outliers_multivariate(self,columns=None,method='mahalanobis',chunksize=100000,sample_size=50000,quantile=0.975,random_state=0):
+        '''
+            Detects rows that are outliers jointly over several numeric features.
+
+            The detector is fitted on a random sample of complete rows and then scored over
+            `self.data` in chunks of `chunksize` rows, so memory is bounded by the chunk size and
+            not by the number of rows.
+
+            Methods:
+            - 'mahalanobis': Robust location and covariance from `MinCovDet`. The score is the
+              Mahalanobis distance, computed per chunk as one batched einsum, and a row is
+              flagged when its squared distance exceeds the chi-square `quantile` with one
+              degree of freedom per column.
+            - 'isolation': `IsolationForest` built from random feature splits, better suited to
+              wide data. The score is the negated `score_samples` (higher means more anomalous)
+              and a row is flagged when `decision_function` is negative.
+
+            Parameters:
+                columns (list, optional): Numeric columns to use. Defaults to every numeric column.
+                method (str): 'mahalanobis' or 'isolation'.
+                chunksize (int): Rows scored per batch.
+                sample_size (int): Maximum number of complete rows used to fit the detector.
+                quantile (float): Chi-square quantile used as the Mahalanobis cut-off.
+                random_state (int): Seed of the sample and of the detector.
+
+            Returns:
+                tuple: (score, mask) as pd.Series aligned with `self.data`. Rows with a missing
+                value in `columns` get a NaN score and are never flagged.
+        '''
         import pandas as pd
         import numpy as np
-        from sklearn.preprocessing import RobustScaler
-        from sklearn.impute import KNNImputer
-        # Calculating lower and upper quantiles 
-        q1 = self.data[self.target_variable].quantile(0.25)
-        q3 = self.data[self.target_variable].quantile(0.75)
 
-        # calculating Inter Quantile Range for Calculating Upper_Extreme and Lower_Extreme
-        iqr = q3-q1
+        if columns is None:
+            columns = list(self.data.select_dtypes(include='number').columns)
+        block = self.data[columns]
+
+        complete = block.notna().all(axis=1).to_numpy()
+        complete_rows = np.flatnonzero(complete)
+        rng = np.random.default_rng(random_state)
+        if complete_rows.size > sample_size:
+            complete_rows = np.sort(rng.choice(complete_rows,sample_size,replace=False))
+        sample = block.iloc[complete_rows].to_numpy(dtype=float)
+
+        if method == 'mahalanobis':
+            from scipy.linalg import pinvh
+            from scipy.stats import chi2
+            from sklearn.covariance import MinCovDet
+
+            mcd = MinCovDet(random_state=random_state).fit(sample)
+            location = mcd.location_
+            precision = pinvh(mcd.covariance_)
+            cutoff = chi2.ppf(quantile,df=len(columns))
+        elif method == 'isolation':
+            from sklearn.ensemble import IsolationForest
+
+            forest = IsolationForest(random_state=random_state).fit(sample)
+        else:
+            raise ValueError("method must be 'mahalanobis' or 'isolation'")
+
+        score = np.full(block.shape[0],np.nan)
+        mask = np.zeros(block.shape[0],dtype=bool)
+
+        for start in range(0,block.shape[0],chunksize):
+            stop = min(start+chunksize,block.shape[0])
+            rows = np.flatnonzero(complete[start:stop])
+            if rows.size == 0:
+                continue
+            chunk = block.iloc[start:stop].to_numpy(dtype=float)[rows]
+
+            if method == 'mahalanobis':
+                diff = chunk - location
+                squared = np.einsum('ij,jk,ik->i',diff,precision,diff)
+                score[start+rows] = np.sqrt(squared)
+                mask[start+rows] = squared > cutoff
+            else:
+                score[start+rows] = -forest.score_samples(chunk)
+                mask[start+rows] = forest.decision_function(chunk) < 0
+
+        return pd.Series(score,index=self.data.index,name='outlier_score'),pd.Series(mask,index=self.data.index,name='is_outlier')
+
+    def fit(self,columns=None):
+        '''
+            Learns the IQR bounds and replacement values of `columns` once, so that later batches
+            can be treated without another quantile pass.
 
-        #Lower Extreme
-        lower_extreme = q1 - (1.5*iqr)
-        upper_extreme = q3 + (1.5*iqr)
+            The bounds are always global; `group_by` is not taken into account.
 
-        
-        #Getting Dimension of data
-        dim = self.data.shape[0]
+            Parameters:
+                columns (str or list, optional): Columns to fit. Defaults to the target variable.
 
-        #The data should contain no missing value priorly
-        #Changing every outlier value to null Value
-        for i in range(dim):
-            val = self.data[self.target_variable][i]
-            if val<lower_extreme or val>upper_extreme:
-                self.data.loc[i,self.target_variable] = np.nan
+            Returns:
+                Outlier_Bounds: The fitted lower/upper extremes, mean and median of every column.
+        '''
+        columns = self._columns(columns)
+        lower_extreme,upper_extreme = self._outlier_bounds(columns,grouped=False)
+        avg = self.data[columns].mean()
+        med = self.data[columns].median()
 
+        bounds = {}
+        for column in columns:
+            bounds[column] = {'lower':float(lower_extreme[column]),'upper':float(upper_extreme[column]),
+                              'mean':float(avg[column]),'median':float(med[column])}
+        return Outlier_Bounds(bounds)
 
-        #Applying RobustScaler to handle Outliers
-        scaler = RobustScaler()
-        scaled_data = scaler.fit_transform(self.data[[self.target_variable]])
-        scaled_df = pd.DataFrame(scaled_data,columns = [self.target_variable])
-        
-        #Createing a KNNImputer instance
-        knn_imputer = KNNImputer(n_neighbors=5)
-        
-        #Using KNNImputer to impute missing Values
-        imputed_data = knn_imputer.fit_transform(scaled_df)
-        imputed_df = pd.DataFrame(imputed_data,columns=scaled_df.columns)
 
-        #Inverse transforming to get back the original data
-        original = scaler.inverse_transform(imputed_df)
-        orignial_df = pd.DataFrame(original,columns = [self.target_variable])
+class Outlier_Bounds:
+    '''
+        Fitted IQR bounds of one or more columns, produced by `Treating_outliers.fit`.
 
-        self.data[self.target_variable] = orignial_df[[self.target_variable]]
+        The object only holds four floats per column, so it can be stored with `to_json` and
+        restored with `from_json`, and then applied to any number of new frames or single
+        records through `transform`.
+    '''
 
-        return self.data
+    methods = ('deletion','imputation_mean','imputation_median','capping')
+
+    def __init__(self,bounds):
+        self.bounds = bounds
+        self.columns = list(bounds)
+
+    def to_dict(self):
+        return {column:dict(values) for column,values in self.bounds.items()}
+
+    @classmethod
+    def from_dict(cls,bounds):
+        return cls({column:{key:float(value) for key,value in values.items()} for column,values in bounds.items()})
+
+    def to_json(self):
+        import json
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls,text):
+        import json
+        return cls.from_dict(json.loads(text))
+
+    def transform(self,data,method='capping'):
+        '''
+            Applies the fitted bounds to a new batch.
+
+            Parameters:
+                data (pd.DataFrame or dict): A frame containing the fitted columns, or a single
+                    record mapping column names to values.
+                method (str): One of 'deletion', 'imputation_mean', 'imputation_median' or 'capping'.
+
+            Returns:
+                pd.DataFrame or dict: The treated frame, or a new treated record. With 'deletion'
+                a record that is an outlier in any fitted column is returned as None.
+        '''
+        if method not in self.methods:
+            raise ValueError(f"method must be one of {self.methods}")
+        if isinstance(data,dict):
+            return self._transform_record(data,method)
+        return self._transform_frame(data,method)
+
+    def _transform_record(self,record,method):
+        record = dict(record)
+        for column,values in self.bounds.items():
+            val = record[column]
+            if val<values['lower'] or val>values['upper']:
+                if method == 'deletion':
+                    return None
+                if method == 'imputation_mean':
+                    record[column] = values['mean']
+                elif method == 'imputation_median':
+                    record[column] = values['median']
+                else:
+                    record[column] = values['lower'] if val<values['lower'] else values['upper']
+        return record
+
+    def _transform_frame(self,data,method):
+        import pandas as pd
+
+        columns = self.columns
+        lower_extreme = pd.Series({column:self.bounds[column]['lower'] for column in columns})
+        upper_extreme = pd.Series({column:self.bounds[column]['upper'] for column in columns})
+        block = data[columns]
+        below = block.lt(lower_extreme,axis=1)
+        above = block.gt(upper_extreme,axis=1)
+
+        if method == 'deletion':
+            return data[~(below | above).any(axis=1).to_numpy()]
+        if method == 'capping':
+            block = block.mask(below,lower_extreme,axis=1).mask(above,upper_extreme,axis=1)
+        else:
+            key = 'mean' if method == 'imputation_mean' else 'median'
+            replacement = pd.Series({column:self.bounds[column][key] for column in columns})
+            block = block.mask(below | above,replacement,axis=1)
+        # Replaced on a shallow copy, as in copy_on_write_step, so the caller's frame keeps its
+        # values and the untreated columns are not copied
+        data = data.copy(deep=False)
+        data[columns] = block
+        return data
+
+
+class Streaming_Treating_outliers:
+    '''
+        Out-of-core IQR outlier treatment for CSV files that do not fit in memory.
+
+        The first pass (`fit`) streams the file in chunks and feeds every column into a
+        `Quantile_Sketch`, whose memory does not grow with the file, while keeping exact sums
+        for the means. The second pass (`transform`) reads the file again chunk by chunk,
+        applies the fitted `Outlier_Bounds` and appends the treated rows to the output file.
+
+        Parameters:
+            path (str): Path of the input CSV file.
+            target_variable (str): Default column to treat.
+            chunksize (int): Number of rows read per chunk.
+            epsilon (float): Rank error bound of the quantile sketches, and so of the
+                Q1/Q3 used for the IQR fences.
+    '''
+
+    def __init__(self,path,target_variable,chunksize=100000,epsilon=0.01):
+        self.path = path
+        self.target_variable = target_variable
+        self.chunksize = chunksize
+        self.epsilon = epsilon
+        self.bounds = None
+
+    def fit(self,columns=None):
+        '''
+            First pass: builds approximate quartiles and medians and exact means of `columns`.
+
+            Returns:
+                Outlier_Bounds: The fitted bounds, also kept in `self.bounds`.
+        '''
+        import pandas as pd
+        from sketches import Quantile_Sketch
+
+        if columns is None:
+            columns = [self.target_variable]
+        elif isinstance(columns,str):
+            columns = [columns]
+
+        sketches = {column:Quantile_Sketch(self.epsilon) for column in columns}
+        totals = {column:0.0 for column in columns}
+
+        for chunk in pd.read_csv(self.path,usecols=columns,chunksize=self.chunksize):
+            for column in columns:
+                sketches[column].update(chunk[column].to_numpy())
+                totals[column] += chunk[column].sum()
+
+        bounds = {}
+        for column in columns:
+            q1,median,q3 = sketches[column].quantile([0.25,0.5,0.75])
+            iqr = q3-q1
+            count = sketches[column].count
+            bounds[column] = {'lower':float(q1 - (1.5*iqr)),'upper':float(q3 + (1.5*iqr)),
+                              'mean':float(totals[column]/count) if count else float('nan'),'median':float(median)}
+
+        self.bounds = Outlier_Bounds(bounds)
+        return self.bounds
+
+    def transform(self,output_path,method='capping',columns=None):
+        '''
+            Second pass: treats the file chunk by chunk and writes the result to `output_path`.
+
+            Parameters:
+                output_path (str): CSV file the treated rows are written to.
+                method (str): One of 'deletion', 'imputation_mean', 'imputation_median' or 'capping'.
+                columns (str or list, optional): Columns to treat. Only used when the bounds
+                    have not been fitted yet.
+
+            Returns:
+                int: Number of rows written.
+        '''
+        import pandas as pd
+
+        if self.bounds is None:
+            self.fit(columns)
+
+        rows = 0
+        for i,chunk in enumerate(pd.read_csv(self.path,chunksize=self.chunksize)):
+            chunk = self.bounds.transform(chunk,method)
+            chunk.to_csv(output_path,mode='w' if i == 0 else 'a',header=(i == 0),index=False)
+            rows += chunk.shape[0]
+
+        return rows
 
 
 